@@ -0,0 +1,151 @@
+"""
+In-process caching primitives.
+"""
+import time
+from collections import OrderedDict
+
+__author__ = 'vadim'
+
+# Marks a `timeout` argument that was not passed, as opposed to `None`
+# (never expire).
+DEFAULT_TIMEOUT = object()
+
+
+class LRUCache:
+    """
+    Mapping bounded to `max_entries` items, and to `max_size` in total when
+    entries are set with a `size`, evicting the least recently used entry
+    first. Entries may expire `timeout` seconds after they were set.
+
+    No method awaits, so a cache shared by the coroutines of one event loop
+    needs no locking.
+    """
+
+    def __init__(self, max_entries=1024, timeout=None, max_size=None):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.max_size = max_size
+        self.size = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return self.get(key, DEFAULT_TIMEOUT) is not DEFAULT_TIMEOUT
+
+    def get(self, key, default=None):
+        try:
+            expires, value, size = self._entries[key]
+        except KeyError:
+            return default
+
+        if expires is not None and expires <= time.monotonic():
+            self.delete(key)
+            return default
+
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, size=0):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.timeout
+        expires = None if timeout is None else time.monotonic() + timeout
+
+        if self.max_size is not None and size > self.max_size:
+            self.delete(key)
+            return
+
+        self.delete(key)
+        self._entries[key] = (expires, value, size)
+        self.size += size
+        while len(self._entries) > self.max_entries or \
+                (self.max_size is not None and self.size > self.max_size):
+            self.evict()
+
+    def evict(self):
+        """
+        Drop the least recently used entry and return its `(key, value)`.
+        """
+        key, (expires, value, size) = self._entries.popitem(last=False)
+        self.size -= size
+        return key, value
+
+    def delete(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self.size -= entry[2]
+        return True
+
+    def clear(self):
+        self._entries.clear()
+        self.size = 0
+
+
+class BaseCache:
+    """
+    Interface of the cache backends used for responses and throttling.
+
+    Backends shared between workers (e.g. Redis or memcached) implement the
+    same coroutines. Namespaces are invalidated by bumping their version,
+    which callers fold into their keys, so no key scan is needed.
+    """
+
+    async def get(self, key, default=None):
+        raise NotImplementedError('.get() must be overridden.')
+
+    async def set(self, key, value, timeout=DEFAULT_TIMEOUT, size=0):
+        raise NotImplementedError('.set() must be overridden.')
+
+    async def delete(self, key):
+        raise NotImplementedError('.delete() must be overridden.')
+
+    async def compare_and_set(self, key, expected, value, timeout=DEFAULT_TIMEOUT):
+        """
+        Atomically set `key` to `value` if its current value equals
+        `expected`, `None` standing for a missing key. Returns `True` if the
+        value was set.
+        """
+        raise NotImplementedError('.compare_and_set() must be overridden.')
+
+    async def get_version(self, namespace):
+        raise NotImplementedError('.get_version() must be overridden.')
+
+    async def incr_version(self, namespace):
+        raise NotImplementedError('.incr_version() must be overridden.')
+
+
+class LocMemCache(BaseCache):
+    """
+    In-process backend on top of `LRUCache`.
+    """
+
+    def __init__(self, max_entries=1024, timeout=300, max_size=None):
+        self._cache = LRUCache(max_entries=max_entries, timeout=timeout, max_size=max_size)
+        self._versions = {}
+
+    async def get(self, key, default=None):
+        return self._cache.get(key, default)
+
+    async def set(self, key, value, timeout=DEFAULT_TIMEOUT, size=0):
+        self._cache.set(key, value, timeout, size)
+
+    async def delete(self, key):
+        return self._cache.delete(key)
+
+    async def compare_and_set(self, key, expected, value, timeout=DEFAULT_TIMEOUT):
+        # Nothing awaits between the read and the write, so no other
+        # coroutine can interleave.
+        if self._cache.get(key) != expected:
+            return False
+        self._cache.set(key, value, timeout)
+        return True
+
+    async def get_version(self, namespace):
+        return self._versions.get(namespace, 0)
+
+    async def incr_version(self, namespace):
+        version = self._versions.get(namespace, 0) + 1
+        self._versions[namespace] = version
+        return version
@@ -45,6 +45,11 @@ class ValidationError(APIException):
         return self.detail
 
 
+class ParseError(APIException):
+    status_code = status.HTTP_400_BAD_REQUEST
+    default_detail = 'Malformed request.'
+
+
 class AuthenticationFailed(APIException):
     status_code = status.HTTP_401_UNAUTHORIZED
     default_detail = 'Incorrect authentication credentials.'
@@ -88,6 +93,17 @@ class NotAcceptable(APIException):
         self.available_renderers = available_renderers
 
 
+class RequestEntityTooLarge(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = 'Request body exceeds the maximum size of {max_size} bytes.'
+
+    def __init__(self, max_size, detail=None):
+        if detail is not None:
+            self.detail = detail
+        else:
+            self.detail = self.default_detail.format(max_size=max_size)
+
+
 class UnsupportedMediaType(APIException):
     status_code = status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
     default_detail = 'Unsupported media type "{media_type}" in request.'
@@ -117,6 +133,5 @@ class Throttled(APIException):
             self.wait = None
         else:
             self.wait = math.ceil(wait)
-            self.detail += ' ' + self.extra_detail_singular.format(wait=self.wait) + \
-                           self.extra_detail_plural.format(wait=self.wait) + \
-                           self.wait
\ No newline at end of file
+            extra_detail = self.extra_detail_singular if self.wait == 1 else self.extra_detail_plural
+            self.detail += ' ' + extra_detail.format(wait=self.wait)
\ No newline at end of file
@@ -1,18 +1,69 @@
 # coding=utf-8
 from __future__ import unicode_literals
 
+import asyncio
 import datetime
+import functools
+import inspect
 from collections import OrderedDict
 
-from aiorest_framework.utils import parse_datetime
+import pytz
+
+from aiorest_framework.utils import parse_datetime, parse_datetimes
+from .settings import api_settings
 from .validators import MaxLengthValidator
 from .exceptions import ValidationError
 
 __author__ = 'vadim'
 
 
+async def resolve(value):
+    """
+    Await `value` if a field hook returned an awaitable.
+    """
+    if inspect.isawaitable(value):
+        value = await value
+    return value
+
+
+def accepts_parent(func):
+    """
+    Returns `True` if the hook `func(self, value, ...)` takes a `parent`
+    argument after its value.
+    """
+    positional = 0
+    for parameter in inspect.signature(func).parameters.values():
+        if parameter.kind == parameter.VAR_POSITIONAL or parameter.name == 'parent':
+            return True
+        if parameter.kind in (parameter.POSITIONAL_ONLY, parameter.POSITIONAL_OR_KEYWORD):
+            positional += 1
+    return positional >= 3
+
+
+def ignore_parent(func):
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def hook(self, value, parent=None):
+            return await func(self, value)
+    else:
+        @functools.wraps(func)
+        def hook(self, value, parent=None):
+            return func(self, value)
+    return hook
+
+
 class Field:
+    """
+    Fields are synchronous by default. A subclass may turn any of the
+    `ASYNC_HOOKS` into a coroutine function; such a field is flagged with
+    `is_async = True` when the class is created, and serializers only await
+    the fields carrying that flag.
+    """
+    ASYNC_HOOKS = ('get_attribute', 'to_representation', 'to_python',
+                   'run_validators', 'run_validation')
+
     _creation_counter = 0
+    is_async = False
 
     field_error_messages = {}
     default_error_messages = {
@@ -38,13 +89,26 @@ class Field:
         self.parent = None
         self.partial = partial
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Hooks overridden with the signature they had before serializers
+        # passed themselves as `parent` keep working.
+        for hook in ('get_attribute', 'run_validation'):
+            func = cls.__dict__.get(hook)
+            if func is not None and not accepts_parent(func):
+                setattr(cls, hook, ignore_parent(func))
+
+        if 'is_async' not in cls.__dict__:
+            cls.is_async = any(inspect.iscoroutinefunction(getattr(cls, hook))
+                               for hook in cls.ASYNC_HOOKS)
+
     def fail(self, key):
         raise ValidationError(self.error_messages[key])
 
-    async def to_representation(self, value):
+    def to_representation(self, value):
         return value
 
-    async def get_attribute(self, instance):
+    def get_attribute(self, instance, parent=None):
         attr_name = self.get_attr_name()
         if isinstance(instance, dict):
             value = instance.get(attr_name)
@@ -53,41 +117,100 @@ class Field:
 
         return value
 
+    def to_representation_many(self, values):
+        """
+        Column of attribute values -> column of primitive datatypes.
+
+        Falsy values are passed through unchanged, as in the per-object path.
+        Fields override this to convert a whole column in one call; such an
+        override must fall back here when a subclass overrides only
+        `to_representation()`.
+        """
+        to_representation = self.to_representation
+        return [value and to_representation(value) for value in values]
+
+    def get_attribute_many(self, instances, parent=None):
+        get_attribute = self.get_attribute
+        return [get_attribute(instance, parent) for instance in instances]
+
     def get_attr_name(self):
         return self.name
 
     def bind(self, parent, name):
+        """
+        Attach the field to its serializer class. Happens once, when the
+        serializer class is created; the serializer instance currently using
+        the field is passed to `get_attribute()`/`run_validation()` instead.
+        """
         self.parent = parent
         self.name = name
-        self.partial = parent.partial
 
-    async def run_validation(self, data):
-        if not data and self.required and not self.parent:
+    def run_validation(self, data, parent=None):
+        """
+        Returns the validated value, or an awaitable of it for `is_async` fields.
+        """
+        if self.is_async:
+            return self._run_validation_async(data, parent)
+
+        if parent is None:
+            parent = self.parent
+
+        if not data and self.required and parent is None:
+            self.fail('required')
+
+        elif not data and getattr(parent, 'partial', self.partial):
+            return self.get_attribute(parent.instance, parent)
+
+        elif not data and not self.required:
+            return data
+
+        data = self.to_python(data)
+        self.run_validators(data)
+        return data
+
+    async def _run_validation_async(self, data, parent=None):
+        if parent is None:
+            parent = self.parent
+
+        if not data and self.required and parent is None:
             self.fail('required')
 
-        elif not data and self.partial:
-            return await self.get_attribute(self.parent.instance)
+        elif not data and getattr(parent, 'partial', self.partial):
+            return await resolve(self.get_attribute(parent.instance, parent))
 
         elif not data and not self.required:
             return data
 
-        data = await self.to_python(data)
-        await self.run_validators(data)
+        data = await resolve(self.to_python(data))
+        await resolve(self.run_validators(data))
         return data
 
-    async def to_python(self, value):
+    def to_python(self, value):
         return value
 
-    async def run_validators(self, data):
+    def to_python_many(self, values):
+        """
+        Column of input values -> column of Python values. Fields override
+        this to parse a whole column in one call.
+        """
+        to_python = self.to_python
+        return [to_python(value) for value in values]
+
+    def run_validators(self, data):
         for validator in self.validators:
             validator(data)
 
 
 class IntegerField(Field):
-    async def to_representation(self, value):
+    def to_representation(self, value):
         return int(value)
 
-    async def to_python(self, value):
+    def to_representation_many(self, values):
+        if type(self).to_representation is not IntegerField.to_representation:
+            return super(IntegerField, self).to_representation_many(values)
+        return [value and int(value) for value in values]
+
+    def to_python(self, value):
         try:
             value = int(value)
         except Exception as exc:
@@ -100,6 +223,44 @@ class SmallIntegerField(IntegerField):
     pass
 
 
+class PrimaryKeyRelatedField(Field):
+    """
+    Key held by a peewee foreign key, read from the raw column data so that
+    the related object is never loaded. The key is passed through as is
+    unless `key_field`, the field of the related primary key, converts it.
+    """
+
+    def __init__(self, *args, key_field=None, **kwargs):
+        self.key_field = key_field
+        super(PrimaryKeyRelatedField, self).__init__(*args, **kwargs)
+
+    def to_representation(self, value):
+        if self.key_field is None:
+            return value
+        return self.key_field.to_representation(value)
+
+    def to_representation_many(self, values):
+        if type(self).to_representation is not PrimaryKeyRelatedField.to_representation:
+            return super(PrimaryKeyRelatedField, self).to_representation_many(values)
+        if self.key_field is None:
+            return list(values)
+        return self.key_field.to_representation_many(values)
+
+    def to_python(self, value):
+        if self.key_field is None:
+            return value
+        return self.key_field.to_python(value)
+
+    def get_attribute(self, instance, parent=None):
+        attr_name = self.get_attr_name()
+        if isinstance(instance, dict):
+            return instance.get(attr_name)
+        data = getattr(instance, '__data__', None)
+        if data is None:
+            data = getattr(instance, '_data', {})
+        return data.get(attr_name)
+
+
 class CharField(Field):
     def __init__(self, *args, max_length=None, **kwargs):
         self.max_length = max_length
@@ -108,27 +269,58 @@ class CharField(Field):
         if self.max_length:
             self.validators.append(MaxLengthValidator(max_length))
 
-    async def to_representation(self, value):
+    def to_representation(self, value):
         return str(value)
 
+    def to_representation_many(self, values):
+        if type(self).to_representation is not CharField.to_representation:
+            return super(CharField, self).to_representation_many(values)
+        return [value and str(value) for value in values]
+
 
 class DateTimeField(Field):
+    """
+    The output is set by `format` ('iso-8601', 'epoch', 'epoch_ms' or a
+    strftime format), `timespec` (precision of 'iso-8601' output) and
+    `timezone` (converted to before output, naive values being taken as
+    UTC), each defaulting to the matching `DATETIME_*` setting. They are
+    compiled into a single formatter on first use.
+    """
     ISO_8601 = 'iso-8601'
+    EPOCH = 'epoch'
+    EPOCH_MS = 'epoch_ms'
     input_formats = (ISO_8601,)
+    datetime_parser = datetime.datetime.strptime
     field_error_messages = {
         'date': 'это значение просто дата',
         'invalid': 'не верный формат',
     }
 
-    async def to_python(self, value):
+    _epoch = datetime.datetime(1970, 1, 1, tzinfo=pytz.utc)
+    _formatter = None
+
+    def __init__(self, *args, input_formats=None, format=None, timespec=None, timezone=None, **kwargs):
+        super(DateTimeField, self).__init__(*args, **kwargs)
+        if input_formats is not None:
+            self.input_formats = input_formats
+        self.format = format
+        self.timespec = timespec
+        self.timezone = timezone
+        # Resolved once rather than lowercasing every format on every value.
+        self._parsers = tuple(
+            None if input_format.lower() == self.ISO_8601 else input_format
+            for input_format in self.input_formats
+        )
+
+    def to_python(self, value):
         if isinstance(value, datetime.date) and not isinstance(value, datetime.datetime):
             self.fail('date')
 
         if isinstance(value, datetime.datetime):
             return value
 
-        for input_format in self.input_formats:
-            if input_format.lower() == self.ISO_8601:
+        for input_format in self._parsers:
+            if input_format is None:
                 try:
                     parsed = parse_datetime(value)
                 except (ValueError, TypeError):
@@ -148,8 +340,81 @@ class DateTimeField(Field):
 
         self.fail('invalid')
 
-    async def to_representation(self, value):
-        return value.isoformat()
+    def to_python_many(self, values):
+        if type(self).to_python is not DateTimeField.to_python or self._parsers[:1] != (None,) or \
+                not all(isinstance(value, str) for value in values):
+            return super(DateTimeField, self).to_python_many(values)
+
+        try:
+            return parse_datetimes(values)
+        except ValueError:
+            # Let the per-value path report the offending value.
+            return super(DateTimeField, self).to_python_many(values)
+
+    def get_formatter(self):
+        if self._formatter is None:
+            self._formatter = self.compile_formatter(
+                api_settings.DATETIME_FORMAT if self.format is None else self.format,
+                api_settings.DATETIME_TIMESPEC if self.timespec is None else self.timespec,
+                api_settings.DATETIME_TIMEZONE if self.timezone is None else self.timezone,
+            )
+        return self._formatter
+
+    @classmethod
+    def compile_formatter(cls, output_format, timespec, timezone):
+        """
+        Returns a function `datetime -> primitive` doing exactly the steps
+        the options call for, so that formatting a value does not branch on
+        the options again.
+        """
+        if output_format.lower() == cls.ISO_8601:
+            if timespec == 'auto':
+                format_value = datetime.datetime.isoformat
+            else:
+                # Fail now on an unknown timespec rather than on first output.
+                datetime.datetime.min.isoformat(timespec=timespec)
+
+                def format_value(value):
+                    return value.isoformat(timespec=timespec)
+        elif output_format == cls.EPOCH:
+            epoch = cls._epoch
+
+            def format_value(value):
+                if value.tzinfo is None:
+                    value = value.replace(tzinfo=pytz.utc)
+                return (value - epoch) // datetime.timedelta(seconds=1)
+        elif output_format == cls.EPOCH_MS:
+            epoch = cls._epoch
+
+            def format_value(value):
+                if value.tzinfo is None:
+                    value = value.replace(tzinfo=pytz.utc)
+                return (value - epoch) // datetime.timedelta(milliseconds=1)
+        else:
+            def format_value(value):
+                return value.strftime(output_format)
+
+        if timezone is None:
+            return format_value
+
+        if isinstance(timezone, str):
+            timezone = pytz.timezone(timezone)
+
+        def convert_and_format(value):
+            if value.tzinfo is None:
+                value = value.replace(tzinfo=pytz.utc)
+            return format_value(value.astimezone(timezone))
+
+        return convert_and_format
+
+    def to_representation(self, value):
+        return self.get_formatter()(value)
+
+    def to_representation_many(self, values):
+        if type(self).to_representation is not DateTimeField.to_representation:
+            return super(DateTimeField, self).to_representation_many(values)
+        format_value = self.get_formatter()
+        return [value and format_value(value) for value in values]
 
 
 class ChoiceField(Field):
@@ -170,7 +435,7 @@ class ChoiceField(Field):
         self.allow_blank = kwargs.pop('allow_blank', False)
         super(ChoiceField, self).__init__(**kwargs)
 
-    async def to_python(self, data):
+    def to_python(self, data):
         if data == '' and self.allow_blank:
             return ''
 
@@ -179,7 +444,7 @@ class ChoiceField(Field):
 
         return data
 
-    async def to_representation(self, value):
+    def to_representation(self, value):
         if value in ('', None):
             return value
         return self.choice_strings_to_values.get(value, value)
@@ -193,7 +458,7 @@ class BooleanField(Field):
         'invalid': '"{input}" не верное булевое значение'
     }
 
-    async def to_internal_value(self, data):
+    def to_internal_value(self, data):
         try:
             if data in self.TRUE_VALUES:
                 return True
@@ -203,7 +468,7 @@ class BooleanField(Field):
             pass
         self.fail('invalid')
 
-    async def to_representation(self, value):
+    def to_representation(self, value):
         if value in self.TRUE_VALUES:
             return True
         elif value in self.FALSE_VALUES:
@@ -212,12 +477,42 @@ class BooleanField(Field):
 
 
 class SerializerMethodField(Field):
-    def __init__(self, *args, method_name=None, **kwargs):
+    """
+    Read-only field whose value is returned by the serializer method
+    `get_<field_name>(instance)`, or `method_name`. The method may be a
+    coroutine function, e.g. awaiting a `DataLoader`.
+
+    When a page is represented, a batch method `get_<field_name>_many(instances)`,
+    or `batch_method_name`, returning the values of all instances in order is
+    used if the serializer defines one. Otherwise the method calls of the page
+    run concurrently, so the loads they make are coalesced into one batch.
+    """
+
+    def __init__(self, *args, method_name=None, batch_method_name=None, **kwargs):
         self.method_name = method_name
+        self.batch_method_name = batch_method_name
         kwargs['read_only'] = True
         super(SerializerMethodField, self).__init__(**kwargs)
 
-    async def get_attribute(self, instance):
-        method_name = self.method_name or 'get_{field_name}'.format(field_name=self.name)
-        method = getattr(self.parent, method_name)
-        return method(instance)
+    def get_method_name(self):
+        return self.method_name or 'get_{field_name}'.format(field_name=self.name)
+
+    async def get_attribute(self, instance, parent=None):
+        method = getattr(parent if parent is not None else self.parent, self.get_method_name())
+        return await resolve(method(instance))
+
+    async def get_attribute_many(self, instances, parent=None):
+        parent = parent if parent is not None else self.parent
+        batch_method_name = self.batch_method_name or self.get_method_name() + '_many'
+        batch_method = getattr(parent, batch_method_name, None)
+        if batch_method is not None:
+            return list(await resolve(batch_method(instances)))
+
+        method = getattr(parent, self.get_method_name())
+        values = [method(instance) for instance in instances]
+        pending = [index for index, value in enumerate(values) if inspect.isawaitable(value)]
+        if pending:
+            results = await asyncio.gather(*[values[index] for index in pending])
+            for index, result in zip(pending, results):
+                values[index] = result
+        return values
@@ -0,0 +1,125 @@
+"""
+Batching and caching of keyed loads, after Facebook's DataLoader.
+"""
+import asyncio
+import functools
+from collections.abc import Mapping
+
+__author__ = 'vadim'
+
+
+class DataLoader:
+    """
+    Coalesces the `load(key)` calls made while the event loop runs one
+    batch of ready tasks (e.g. the method fields of a page gathered by
+    `SerializerMethodField`) into a single `batch_load(keys)` call, and
+    memoizes the result of every key for the life of the loader.
+
+    `batch_load` is a coroutine function returning either a list of values
+    in the order of `keys` or a mapping of key to value, missing keys
+    loading as `None`. Create one loader per request, e.g. with
+    `BaseSerializer.get_loader()`, so that memoized values never outlive
+    the request.
+
+        async def load_comment_counts(post_ids):
+            ...
+
+        counts = DataLoader(load_comment_counts)
+        count = await counts.load(post.id)
+    """
+
+    def __init__(self, batch_load=None, max_batch_size=None):
+        if batch_load is not None:
+            self.batch_load = batch_load
+        self.max_batch_size = max_batch_size
+        self._futures = {}
+        self._queue = []
+        # Running batches, referenced so they are not garbage collected.
+        self._tasks = set()
+
+    async def batch_load(self, keys):
+        raise NotImplementedError('.batch_load() must be overridden.')
+
+    def load(self, key):
+        """
+        Returns an awaitable of the value of `key`. The memoized future is
+        shared by every caller of the key, so it is shielded: cancelling one
+        waiter leaves the others, and the batch, alone.
+        """
+        future = self._futures.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self._futures[key] = loop.create_future()
+            if not self._queue:
+                loop.call_soon(self.dispatch)
+            self._queue.append((key, future))
+        return asyncio.shield(future)
+
+    def load_many(self, keys):
+        return asyncio.gather(*[self.load(key) for key in keys])
+
+    def prime(self, key, value):
+        """
+        Memoize `value` for `key` unless it is already loaded or pending.
+        """
+        if key not in self._futures:
+            future = self._futures[key] = asyncio.get_running_loop().create_future()
+            future.set_result(value)
+
+    def clear(self, key=None):
+        if key is None:
+            self._futures.clear()
+        else:
+            self._futures.pop(key, None)
+
+    def dispatch(self):
+        queue, self._queue = self._queue, []
+        size = self.max_batch_size or len(queue)
+        for start in range(0, len(queue), size):
+            batch = queue[start:start + size]
+            task = asyncio.ensure_future(self.load_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(functools.partial(self.finish_batch, batch))
+
+    async def load_batch(self, batch):
+        keys = [key for key, future in batch]
+        try:
+            values = await self.batch_load(keys)
+            if isinstance(values, Mapping):
+                values = [values.get(key) for key in keys]
+            else:
+                values = list(values)
+                if len(values) != len(keys):
+                    raise ValueError(
+                        '.batch_load() returned {values} values for {keys} keys.'.format(
+                            values=len(values), keys=len(keys))
+                    )
+
+            for (key, future), value in zip(batch, values):
+                if not future.done():
+                    future.set_result(value)
+        except Exception as exc:
+            self.reject(batch, exc)
+
+    def finish_batch(self, batch, task):
+        self._tasks.discard(task)
+        # The task was cancelled, possibly before it started: never leave a
+        # waiter of the batch hanging.
+        for key, future in batch:
+            if not future.done():
+                self.forget(key, future)
+                future.cancel()
+
+    def reject(self, batch, exc):
+        """
+        Fail every pending future of `batch` with `exc`. Failed keys are not
+        memoized, so a later load retries them.
+        """
+        for key, future in batch:
+            if not future.done():
+                self.forget(key, future)
+                future.set_exception(exc)
+
+    def forget(self, key, future):
+        if self._futures.get(key) is future:
+            del self._futures[key]
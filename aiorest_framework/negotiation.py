@@ -0,0 +1,87 @@
+"""
+Content negotiation deals with selecting an appropriate parser or renderer
+given the incoming request. Typically this will be based on the request's
+Content-Type and Accept headers.
+"""
+from .exceptions import NotAcceptable, UnsupportedMediaType
+
+__author__ = 'vadim'
+
+
+def parse_accept_header(header):
+    """
+    Return the media ranges of an Accept header as `(media_type, quality)`
+    pairs, best first. Ranges of equal quality keep their order.
+    """
+    media_ranges = []
+    for part in header.split(','):
+        media_type, _, params = part.strip().partition(';')
+        media_type = media_type.strip().lower()
+        if not media_type:
+            continue
+
+        quality = 1.0
+        for param in params.split(';'):
+            key, _, value = param.partition('=')
+            if key.strip() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+
+        if quality > 0:
+            media_ranges.append((media_type, quality))
+
+    media_ranges.sort(key=lambda media_range: -media_range[1])
+    return media_ranges
+
+
+def media_type_matches(media_range, media_type):
+    """
+    Return `True` if `media_type` (e.g. 'application/json') falls within
+    `media_range` (e.g. 'application/*').
+    """
+    if media_range == '*/*':
+        return True
+
+    range_main, _, range_sub = media_range.partition('/')
+    main, _, sub = media_type.lower().partition('/')
+    return range_main == main and range_sub in ('*', sub)
+
+
+class BaseContentNegotiation:
+    def select_parser(self, request, parsers):
+        raise NotImplementedError('.select_parser() must be implemented')
+
+    def select_renderer(self, request, renderers):
+        raise NotImplementedError('.select_renderer() must be implemented')
+
+
+class DefaultContentNegotiation(BaseContentNegotiation):
+    def select_parser(self, request, parsers):
+        """
+        Given a request and a list of parsers, return the parser that handles
+        the request's Content-Type.
+        """
+        content_type = request.content_type
+        for parser in parsers:
+            if media_type_matches(parser.media_type, content_type):
+                return parser
+
+        raise UnsupportedMediaType(content_type)
+
+    def select_renderer(self, request, renderers):
+        """
+        Given a request and a list of renderers, return the first renderer
+        that satisfies the request's Accept header.
+        """
+        header = request.headers.get('Accept')
+        if not header:
+            return renderers[0]
+
+        for media_range, quality in parse_accept_header(header):
+            for renderer in renderers:
+                if media_type_matches(media_range, renderer.media_type):
+                    return renderer
+
+        raise NotAcceptable(available_renderers=renderers)
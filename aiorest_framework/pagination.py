@@ -1,6 +1,14 @@
+import asyncio
+import base64
+import binascii
 import collections
+import json
 from math import ceil
+from urllib.parse import urlencode
 
+import peewee
+
+from aiorest_framework.cache import LRUCache
 from aiorest_framework.exceptions import NotFound
 from aiorest_framework.settings import api_settings
 
@@ -17,7 +25,118 @@ class EmptyPage(InvalidPage):
     pass
 
 
+def get_query_model(query):
+    """
+    Returns the model a peewee select query is built on.
+    """
+    model = getattr(query, 'model', None)
+    if model is None:
+        model = query.model_class
+    return model
+
+
+Count = collections.namedtuple('Count', ['value', 'exact'])
+
+
+class ExactCount:
+    """
+    Counts with `object_list.count()`, or `len()` for plain sequences.
+    """
+
+    async def get_count(self, object_list):
+        try:
+            count = object_list.count()
+        except (AttributeError, TypeError):
+            # AttributeError if object_list has no count() method.
+            # TypeError if object_list.count() requires arguments
+            # (i.e. is of type list).
+            count = len(object_list)
+        return Count(count, exact=True)
+
+
+class CachedCount:
+    """
+    Caches the counts of another strategy for `timeout` seconds, keyed by
+    the query's SQL and parameters. Instances are meant to be shared, e.g.
+    as the `count_strategy` of a `Paginator` subclass, so that the cache
+    outlives the per-request paginator.
+    """
+
+    def __init__(self, strategy=None, timeout=60, max_entries=1024):
+        self.strategy = strategy or ExactCount()
+        self.cache = LRUCache(max_entries=max_entries, timeout=timeout)
+
+    def get_key(self, object_list):
+        try:
+            sql, params = object_list.sql()
+        except AttributeError:
+            return None
+        return sql, tuple(params)
+
+    async def get_count(self, object_list):
+        key = self.get_key(object_list)
+        if key is None:
+            return await self.strategy.get_count(object_list)
+
+        count = self.cache.get(key)
+        if count is None:
+            count = await self.strategy.get_count(object_list)
+            self.cache.set(key, count)
+        return count
+
+
+class EstimatedCount:
+    """
+    Reads the planner's row estimate of a peewee query and reports it as an
+    approximate count once it reaches `cutoff`. Smaller results, and
+    databases without a supported estimate, are counted exactly.
+    """
+
+    def __init__(self, cutoff=100000, strategy=None):
+        self.cutoff = cutoff
+        self.strategy = strategy or ExactCount()
+
+    async def get_count(self, object_list):
+        estimate = await self.get_estimate(object_list)
+        if estimate is not None and estimate >= self.cutoff:
+            return Count(estimate, exact=False)
+        return await self.strategy.get_count(object_list)
+
+    async def get_estimate(self, object_list):
+        """
+        Returns the planner's row estimate, or `None` when there is none.
+        """
+        try:
+            sql, params = object_list.sql()
+            database = get_query_model(object_list)._meta.database
+        except AttributeError:
+            return None
+
+        if not isinstance(database, peewee.PostgresqlDatabase):
+            return None
+
+        row = await self.execute_sql(database, 'EXPLAIN (FORMAT JSON) ' + sql, params)
+        plan = row[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+
+    async def execute_sql(self, database, sql, params):
+        """
+        Returns the first row of `sql`. Override to run it through an async manager.
+        """
+        return database.execute_sql(sql, params).fetchone()
+
+
 class Paginator:
+    # Shared by every paginator of the class; see `CachedCount`.
+    count_strategy = ExactCount()
+
+    # Run the count and slice queries concurrently instead of one after the
+    # other. The slice is fetched before the page number is known to be in
+    # range and is thrown away if it is not.
+    optimistic = False
+
     def __init__(self, object_list, per_page, orphans=0,
                  allow_empty_first_page=True):
         self.object_list = object_list
@@ -25,12 +144,16 @@ class Paginator:
         self.orphans = int(orphans)
         self.allow_empty_first_page = allow_empty_first_page
         self.count = 0
+        self.count_is_exact = True
         self._num_pages = self._count = None
 
     async def page(self, number):
         """
         Returns a Page object for the given 1-based page number.
         """
+        if self.optimistic:
+            return await self.optimistic_page(number)
+
         self.count = await self.get_count()
         number = self.validate_number(number)
         bottom = (number - 1) * self.per_page
@@ -41,9 +164,29 @@ class Paginator:
         object_list = await self.get_slice(bottom, top)
         return self._get_page(object_list, number, self)
 
-    def validate_number(self, number):
+    async def optimistic_page(self, number):
         """
-        Validates the given 1-based page number.
+        Same as `page()`, but with the count and slice queries in flight at
+        the same time. The slice reaches `orphans` rows further, so that the
+        last page can still absorb them once the count is known.
+        """
+        number = self.parse_number(number)
+        bottom = (number - 1) * self.per_page
+        top = bottom + self.per_page
+
+        self.count, object_list = await asyncio.gather(
+            self.get_count(), self.get_slice(bottom, top + self.orphans)
+        )
+        number = self.validate_number(number)
+        if top + self.orphans < self.count:
+            object_list = list(object_list)[:self.per_page]
+
+        return self._get_page(object_list, number, self)
+
+    @staticmethod
+    def parse_number(number):
+        """
+        Casts the given 1-based page number to an int.
         """
         try:
             number = int(number)
@@ -51,6 +194,13 @@ class Paginator:
             raise PageNotAnInteger('That page number is not an integer')
         if number < 1:
             raise EmptyPage('That page number is less than 1')
+        return number
+
+    def validate_number(self, number):
+        """
+        Validates the given 1-based page number.
+        """
+        number = self.parse_number(number)
 
         num_pages = self.num_pages
         if number > num_pages:
@@ -77,13 +227,8 @@ class Paginator:
         Returns the total number of objects, across all pages.
         """
         if self._count is None:
-            try:
-                self._count = self.object_list.count()
-            except (AttributeError, TypeError):
-                # AttributeError if object_list has no count() method.
-                # TypeError if object_list.count() requires arguments
-                # (i.e. is of type list).
-                self._count = len(self.object_list)
+            count = await self.count_strategy.get_count(self.object_list)
+            self._count, self.count_is_exact = count
         return self._count
 
     @property
@@ -166,13 +311,101 @@ class Page(collections.Sequence):
         return self.number * self.paginator.per_page
 
 
+class NoCountPaginator(Paginator):
+    """
+    Paginator that never counts. It fetches `per_page + 1` rows and uses the
+    extra row to tell whether a next page exists, so `count` and `num_pages`
+    stay `None`. `orphans` is not supported.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(NoCountPaginator, self).__init__(*args, **kwargs)
+        self.count = None
+
+    async def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        object_list = list(await self.get_slice(bottom, bottom + self.per_page + 1))
+
+        has_next = len(object_list) > self.per_page
+        object_list = object_list[:self.per_page]
+        if not object_list and (number > 1 or not self.allow_empty_first_page):
+            raise EmptyPage('That page contains no results')
+
+        return NoCountPage(object_list, number, self, has_next)
+
+    def validate_number(self, number):
+        return self.parse_number(number)
+
+    async def get_count(self):
+        raise NotImplementedError('NoCountPaginator does not count objects.')
+
+    @property
+    def num_pages(self):
+        return None
+
+
+class NoCountPage(Page):
+
+    def __init__(self, object_list, number, paginator, has_next):
+        super(NoCountPage, self).__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def __repr__(self):
+        return '<Page %s>' % self.number
+
+    def has_next(self):
+        return self._has_next
+
+    def start_index(self):
+        if not self.object_list:
+            return 0
+        return (self.paginator.per_page * (self.number - 1)) + 1
+
+    def end_index(self):
+        return self.start_index() + len(self.object_list) - 1 if self.object_list else 0
+
+
 class BasePagination:
+    # Client can control the page size using this query parameter.
+    # Default is 'None'. Set to eg 'page_size' to enable usage.
+    page_size_query_param = None
+
+    # Set to an integer to limit the maximum page size the client may request.
+    # Only relevant if 'page_size_query_param' has also been set.
+    max_page_size = None
+
     async def paginate_object_list(self, queryset, request, view=None):  # pragma: no cover
         raise NotImplementedError('paginate_queryset() must be implemented.')
 
     def get_paginated_response(self, data):  # pragma: no cover
         raise NotImplementedError('get_paginated_response() must be implemented.')
 
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                return self._positive_int(
+                    request.GET[self.page_size_query_param],
+                    strict=True,
+                    cutoff=self.max_page_size
+                )
+            except (KeyError, ValueError):
+                pass
+
+        return self.page_size
+
+    @staticmethod
+    def _positive_int(integer_string, strict=False, cutoff=None):
+        """
+        Cast a string to a strictly positive integer.
+        """
+        ret = int(integer_string)
+        if ret < 0 or (ret == 0 and strict):
+            raise ValueError()
+        if cutoff:
+            ret = min(ret, cutoff)
+        return ret
+
 
 class PageNumberPagination(BasePagination):
     """
@@ -181,6 +414,11 @@ class PageNumberPagination(BasePagination):
 
     http://api.example.org/accounts/?page=4
     http://api.example.org/accounts/?page=4&page_size=100
+
+    Given a `view`, the query is narrowed by the permissions defining
+    `filter_query()` before it is counted and sliced. Permissions that only
+    check rows hide them from the page afterwards, which leaves the page
+    short and the count approximate.
     """
     # The default page size.
     # Defaults to `None`, meaning pagination is disabled.
@@ -189,14 +427,6 @@ class PageNumberPagination(BasePagination):
     # Client can control the page using this query parameter.
     page_query_param = 'page'
 
-    # Client can control the page size using this query parameter.
-    # Default is 'None'. Set to eg 'page_size' to enable usage.
-    page_size_query_param = None
-
-    # Set to an integer to limit the maximum page size the client may request.
-    # Only relevant if 'page_size_query_param' has also been set.
-    max_page_size = None
-
     paginator_class = Paginator
 
     last_page_strings = ('last',)
@@ -212,6 +442,9 @@ class PageNumberPagination(BasePagination):
         if not page_size:
             return None
 
+        if view is not None:
+            object_list = await view.filter_query_permissions(object_list)
+
         paginator = self.get_paginator(object_list, page_size)
         page_number = request.GET.get(self.page_query_param, 1)
         if page_number in self.last_page_strings:
@@ -225,6 +458,18 @@ class PageNumberPagination(BasePagination):
             )
             raise NotFound(msg)
 
+        if view is not None:
+            # Permissions that cannot filter the query are checked on the
+            # page: their hidden rows make it short, and the count is marked
+            # approximate since rows hidden on other pages are not known.
+            object_list = list(self.page.object_list)
+            permitted = await view.filter_object_permissions(object_list, query_filtered=True)
+            hidden = len(object_list) - len(permitted)
+            if hidden and paginator.count is not None:
+                paginator.count -= hidden
+                paginator.count_is_exact = False
+            self.page.object_list = permitted
+
         self.request = request
         return self.page.object_list
 
@@ -232,34 +477,183 @@ class PageNumberPagination(BasePagination):
         return self.paginator_class(*args, **kwargs)
 
     def get_paginated_response(self, data):
-        return collections.OrderedDict([
+        # `data` may also be an async iterator such as
+        # `ListSerializer.iter_representation()`; `APIView` then streams
+        # the whole envelope.
+        response = collections.OrderedDict([
             ('count', self.page.paginator.count),
+        ])
+        if not self.page.paginator.count_is_exact:
+            response['count_approximate'] = True
+        response.update([
             ('has_next', self.page.has_next()),
             ('has_previous', self.page.has_previous()),
             ('results', data)
         ])
+        return response
 
-    def get_page_size(self, request):
-        if self.page_size_query_param:
-            try:
-                return self._positive_int(
-                    request.query_params[self.page_size_query_param],
-                    strict=True,
-                    cutoff=self.max_page_size
-                )
-            except (KeyError, ValueError):
-                pass
 
-        return self.page_size
+class NoCountPageNumberPagination(PageNumberPagination):
+    """
+    Page number pagination without the COUNT query, e.g. for infinite
+    scrolling. The envelope reports `has_next`/`has_previous` but no `count`,
+    and the 'last' page cannot be requested.
+    """
+    paginator_class = NoCountPaginator
 
-    @staticmethod
-    def _positive_int(integer_string, strict=False, cutoff=None):
+    last_page_strings = ()
+
+    def get_paginated_response(self, data):
+        return collections.OrderedDict([
+            ('has_next', self.page.has_next()),
+            ('has_previous', self.page.has_previous()),
+            ('results', data)
+        ])
+
+
+Cursor = collections.namedtuple('Cursor', ['position', 'reverse'])
+
+
+class CursorPagination(BasePagination):
+    """
+    Keyset pagination for peewee queries. Pages are fetched with
+    `WHERE key > last ORDER BY key LIMIT n`, so neither an OFFSET nor a
+    COUNT query is run and deep pages cost the same as the first one.
+
+    The `ordering` column must be unique and indexed. Clients move between
+    pages with the opaque `next`/`previous` links of the response:
+
+    http://api.example.org/accounts/?cursor=eyJwIjoxMH0=
+    """
+    page_size = api_settings.PAGE_SIZE
+
+    # Client moves between pages using this query parameter.
+    cursor_query_param = 'cursor'
+
+    # Column the pages are ordered by. Prefix with '-' for descending order.
+    ordering = 'id'
+
+    invalid_cursor_message = 'Invalid cursor.'
+
+    async def paginate_object_list(self, object_list, request, view=None):
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        if view is not None:
+            object_list = await view.filter_query_permissions(object_list)
+
+        self.request = request
+        self.cursor = self.decode_cursor(request.GET.get(self.cursor_query_param))
+        reverse = self.cursor is not None and self.cursor.reverse
+
+        field_name, descending = self.get_ordering()
+        column = getattr(get_query_model(object_list), field_name)
+
+        # Walking backwards flips the sort order; the page is put back in
+        # the requested order once fetched.
+        descending_query = descending != reverse
+        query = object_list.order_by(column.desc() if descending_query else column.asc())
+        if self.cursor is not None:
+            position = self.cursor.position
+            query = query.where(column < position if descending_query else column > position)
+
+        rows = list(await self.get_rows(query.limit(page_size + 1)))
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+
+        if reverse:
+            rows.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None
+
+        # The links are built from the fetched rows, so that rows hidden by
+        # permissions that cannot filter the query are still skipped over;
+        # such rows make the page short.
+        self.page = rows
+        if view is not None:
+            rows = await view.filter_object_permissions(rows, query_filtered=True)
+        return rows
+
+    async def get_rows(self, query):
         """
-        Cast a string to a strictly positive integer.
+        Executes the page query. Override to run it through an async manager.
         """
-        ret = int(integer_string)
-        if ret < 0 or (ret == 0 and strict):
-            raise ValueError()
-        if cutoff:
-            ret = min(ret, cutoff)
-        return ret
\ No newline at end of file
+        return list(query)
+
+    def get_ordering(self):
+        """
+        Returns `(field_name, descending)` for the `ordering` attribute.
+        """
+        if self.ordering.startswith('-'):
+            return self.ordering[1:], True
+        return self.ordering, False
+
+    def get_position(self, instance):
+        field_name, descending = self.get_ordering()
+        if isinstance(instance, dict):
+            return instance[field_name]
+        return getattr(instance, field_name)
+
+    def encode_cursor(self, cursor):
+        payload = {'p': cursor.position}
+        if cursor.reverse:
+            payload['r'] = 1
+        data = json.dumps(payload, default=str, separators=(',', ':'))
+        return base64.urlsafe_b64encode(data.encode('utf-8')).decode('ascii')
+
+    def decode_cursor(self, encoded):
+        """
+        Returns the `Cursor` of the query parameter, or `None` for the first page.
+        """
+        if not encoded:
+            return None
+
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            position = payload['p']
+            reverse = bool(payload.get('r'))
+        except (binascii.Error, UnicodeError, ValueError, TypeError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+        # Cursors are client input: anything but a scalar would reach the
+        # WHERE clause and fail there.
+        if isinstance(position, bool) or not isinstance(position, (str, int, float)):
+            raise NotFound(self.invalid_cursor_message)
+        return Cursor(position=position, reverse=reverse)
+
+    def get_link(self, cursor):
+        params = [
+            (key, value) for key, value in self.request.GET.items()
+            if key != self.cursor_query_param
+        ]
+        if cursor is not None:
+            params.append((self.cursor_query_param, self.encode_cursor(cursor)))
+
+        url = '{scheme}://{host}{path}'.format(
+            scheme=self.request.scheme, host=self.request.host, path=self.request.path
+        )
+        return url + '?' + urlencode(params) if params else url
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if not self.page:
+            # Walked backwards past the first row: start over.
+            return self.get_link(None)
+        return self.get_link(Cursor(position=self.get_position(self.page[-1]), reverse=False))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.get_link(Cursor(position=self.get_position(self.page[0]), reverse=True))
+
+    def get_paginated_response(self, data):
+        return collections.OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ])
@@ -0,0 +1,105 @@
+"""
+Parsers are used to parse the content of incoming HTTP requests.
+
+They give us a generic way of being able to handle various media types
+on the request, such as form content or json encoded data.
+"""
+import json
+
+from .exceptions import ParseError, RequestEntityTooLarge
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+__author__ = 'vadim'
+
+if orjson is not None:
+    json_loads = orjson.loads
+elif ujson is not None:
+    json_loads = ujson.loads
+else:
+    json_loads = json.loads
+
+
+def check_content_length(request, max_size):
+    """
+    Reject a request whose declared length exceeds `max_size` before any of
+    its body is read.
+    """
+    if max_size is not None and (request.content_length or 0) > max_size:
+        raise RequestEntityTooLarge(max_size)
+
+
+async def read_body(request, max_size=None, chunk_size=64 * 1024):
+    """
+    Read the request body, aborting as soon as more than `max_size` bytes
+    arrive, so that bodies without a Content-Length are bounded as well.
+    """
+    check_content_length(request, max_size)
+
+    body = bytearray()
+    while True:
+        chunk = await request.content.read(chunk_size)
+        if not chunk:
+            break
+        body += chunk
+        if max_size is not None and len(body) > max_size:
+            raise RequestEntityTooLarge(max_size)
+
+    return bytes(body)
+
+
+class BaseParser:
+    """
+    All parsers should extend `BaseParser`, specifying a `media_type`
+    attribute, and overriding the `.parse()` method.
+    """
+    media_type = None
+
+    async def parse(self, request, max_size=None):
+        """
+        Given the underlying aiohttp request, return the parsed data.
+        """
+        raise NotImplementedError('.parse() must be overridden.')
+
+
+class JSONParser(BaseParser):
+    """
+    Parses JSON-serialized data, with orjson or ujson when installed.
+    """
+    media_type = 'application/json'
+
+    async def parse(self, request, max_size=None):
+        body = await read_body(request, max_size)
+        if not body:
+            return {}
+
+        try:
+            return json_loads(body)
+        except ValueError as exc:
+            raise ParseError('JSON parse error - %s' % exc)
+
+
+class FormParser(BaseParser):
+    """
+    Parser for form data.
+    """
+    media_type = 'application/x-www-form-urlencoded'
+
+    async def parse(self, request, max_size=None):
+        check_content_length(request, max_size)
+        return await request.post()
+
+
+class MultiPartParser(FormParser):
+    """
+    Parser for multipart form data, which may include file data.
+    """
+    media_type = 'multipart/form-data'
@@ -5,10 +5,20 @@ Provides a set of pluggable permission policies.
 SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
 
 
+def is_authenticated(request):
+    user = request.user
+    return bool(user and user.is_authenticated())
+
+
 class BasePermission(object):
     """
     A base class from which all permission classes should inherit.
+
+    Every request gets fresh permission instances. Set `stateless = True` on
+    permissions that keep no per-request state to have them instantiated
+    once per view class and shared by its requests instead.
     """
+    stateless = False
 
     async def has_permission(self, request, view):
         """
@@ -16,6 +26,47 @@ class BasePermission(object):
         """
         return True
 
+    async def has_object_permission(self, request, view, obj):
+        """
+        Return `True` if permission is granted on `obj`, `False` otherwise.
+        """
+        return True
+
+    async def has_object_permissions(self, request, view, objs):
+        """
+        Return a list of booleans, one per object of `objs`, telling whether
+        permission is granted on it. Override to resolve a whole page at once,
+        e.g. with a single ownership query; by default every object goes
+        through `has_object_permission()`.
+        """
+        return [await self.has_object_permission(request, view, obj) for obj in objs]
+
+    async def filter_query(self, request, view, query):
+        """
+        Return `query` narrowed to the objects permission is granted on.
+        Permissions able to express their object check this way override it,
+        so that list endpoints filter in the database before paginating and
+        their pages and counts stay exact; their row-by-row check is then
+        skipped on the rows of such a query.
+        """
+        return query
+
+    def checks_objects(self):
+        """
+        Return `True` if this permission defines any object-level check.
+        """
+        cls = type(self)
+        return (
+            cls.has_object_permission is not BasePermission.has_object_permission or
+            cls.has_object_permissions is not BasePermission.has_object_permissions
+        )
+
+    def filters_query(self):
+        """
+        Return `True` if this permission narrows queries with `filter_query()`.
+        """
+        return type(self).filter_query is not BasePermission.filter_query
+
 
 class AllowAny(BasePermission):
     """
@@ -24,6 +75,7 @@ class AllowAny(BasePermission):
     permission_classes list, but it's useful because it makes the intention
     more explicit.
     """
+    stateless = True
 
     async def has_permission(self, request, view):
         return True
@@ -33,15 +85,17 @@ class IsAuthenticated(BasePermission):
     """
     Allows access only to authenticated users.
     """
+    stateless = True
 
     async def has_permission(self, request, view):
-        return request.user and request.user.is_authenticated()
+        return await request.memo('is_authenticated', is_authenticated, request)
 
 
 class IsAdminUser(BasePermission):
     """
     Allows access only to admin users.
     """
+    stateless = True
 
     async def has_permission(self, request, view):
         return request.user and request.user.is_staff
@@ -51,10 +105,10 @@ class IsAuthenticatedOrReadOnly(BasePermission):
     """
     The request is authenticated as a user, or is a read-only request.
     """
+    stateless = True
 
     async def has_permission(self, request, view):
         return (
             request.method in SAFE_METHODS or
-            request.user and
-            request.user.is_authenticated()
+            await request.memo('is_authenticated', is_authenticated, request)
         )
@@ -0,0 +1,144 @@
+"""
+Renderers are used to serialize a response into specific media types.
+
+`FastJSONRenderer` is the best JSON renderer available in the environment:
+orjson, then ujson, then the standard library.
+"""
+import datetime
+import decimal
+import json
+import uuid
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+__author__ = 'vadim'
+
+
+def encode_default(obj):
+    """
+    Encode the types the JSON backends do not handle natively.
+    """
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    elif isinstance(obj, (decimal.Decimal, uuid.UUID)):
+        return str(obj)
+    elif isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError('Object of type {type} is not JSON serializable'.format(type=type(obj).__name__))
+
+
+class JSONEncoder(json.JSONEncoder):
+    def default(self, obj):
+        try:
+            return encode_default(obj)
+        except TypeError:
+            return super(JSONEncoder, self).default(obj)
+
+
+class BaseRenderer:
+    """
+    All renderers should extend this class, setting the `media_type`
+    and `format` attributes, and override the `.render()` method.
+    """
+    media_type = None
+    format = None
+    charset = 'utf-8'
+
+    def render(self, data):
+        """
+        Python data -> response body `bytes`, or `None` for an empty body.
+        """
+        raise NotImplementedError('Renderer class requires .render() to be implemented')
+
+    def render_stream(self, data):
+        """
+        Async iterator of `bytes` chunks for a streaming response.
+        """
+        raise NotImplementedError('Renderer class does not support streaming responses')
+
+
+class JSONRenderer(BaseRenderer):
+    """
+    Renderer which serializes to JSON with the standard library.
+    """
+    media_type = 'application/json'
+    format = 'json'
+    encoder_class = JSONEncoder
+    # Every backend writes UTF-8 rather than ASCII escapes (`orjson` cannot
+    # do otherwise), so the same data encodes to the same bytes, and thus
+    # the same ETags and cache entries, whichever backend is installed.
+    ensure_ascii = False
+
+    def dumps(self, data):
+        return json.dumps(
+            data, cls=self.encoder_class, separators=(',', ':'), ensure_ascii=self.ensure_ascii
+        ).encode(self.charset)
+
+    def render(self, data):
+        if data is None:
+            return None
+        return self.dumps(data)
+
+    async def render_stream(self, data):
+        """
+        Encode `data` piece by piece. Async iterators are written as JSON
+        arrays one item at a time; everything else is encoded whole.
+        """
+        if hasattr(data, '__aiter__'):
+            yield b'['
+            separator = b''
+            async for item in data:
+                yield separator + self.dumps(item)
+                separator = b','
+            yield b']'
+
+        elif isinstance(data, dict):
+            yield b'{'
+            separator = b''
+            for key, value in data.items():
+                yield separator + self.dumps(str(key)) + b':'
+                async for chunk in self.render_stream(value):
+                    yield chunk
+                separator = b','
+            yield b'}'
+
+        else:
+            yield self.dumps(data)
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    Renderer backed by `orjson`. Encodes `datetime` and `UUID` natively.
+    """
+    if orjson is not None:
+        options = orjson.OPT_NON_STR_KEYS
+
+    def dumps(self, data):
+        return orjson.dumps(data, default=encode_default, option=self.options)
+
+
+class UJSONRenderer(JSONRenderer):
+    """
+    Renderer backed by `ujson`.
+    """
+
+    def dumps(self, data):
+        return ujson.dumps(
+            data, default=encode_default, ensure_ascii=self.ensure_ascii, escape_forward_slashes=False
+        ).encode(self.charset)
+
+
+if orjson is not None:
+    FastJSONRenderer = ORJSONRenderer
+elif ujson is not None:
+    FastJSONRenderer = UJSONRenderer
+else:
+    FastJSONRenderer = JSONRenderer
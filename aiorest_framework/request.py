@@ -1,22 +1,66 @@
+import asyncio
+import inspect
+
+from .settings import api_settings
 
 __author__ = 'vadim'
 
+# Marks `Request.data` as not parsed yet, as opposed to an empty body.
+_empty = object()
+
 
 class Request:
-    def __init__(self, request):
+    def __init__(self, request, parsers=None, negotiator=None, max_body_size=_empty):
         self._request = request
-        self._data = None
+        self._data = _empty
+        if parsers is None:
+            parsers = [parser() for parser in api_settings.DEFAULT_PARSER_CLASSES]
+        self.parsers = parsers
+        self.negotiator = negotiator or api_settings.DEFAULT_CONTENT_NEGOTIATION_CLASS()
+        self.max_body_size = api_settings.MAX_BODY_SIZE if max_body_size is _empty else max_body_size
+        self._memo = {}
 
     @property
     async def data(self):
-        if not self._data:
-            if self._request.method == 'GET':
-                self._data = self._request.GET
-
-            self._data = await self._request.post()
+        if self._data is _empty:
+            self._data = await self._parse()
 
         return self._data
 
+    async def _parse(self):
+        """
+        Parse the request content with the parser matching its Content-Type.
+        Requests without a body give the query parameters for GET and an
+        empty dict otherwise.
+        """
+        request = self._request
+        if request.method == 'GET':
+            return request.GET
+
+        if not request.content_length and 'Content-Type' not in request.headers:
+            return {}
+
+        parser = self.negotiator.select_parser(request, self.parsers)
+        return await parser.parse(request, self.max_body_size)
+
+    async def memo(self, key, func, *args):
+        """
+        Returns `func(*args)`, evaluated once per request under `key`.
+        Awaitable results are awaited once and shared by every caller,
+        including concurrent ones.
+        """
+        try:
+            value = self._memo[key]
+        except KeyError:
+            value = func(*args)
+            if inspect.isawaitable(value):
+                value = asyncio.ensure_future(value)
+            self._memo[key] = value
+
+        if isinstance(value, asyncio.Future):
+            return await value
+        return value
+
     def __getattribute__(self, attr):
         """
         If an attribute does not exist on this instance, then we also attempt
@@ -25,4 +69,4 @@ class Request:
         try:
             return super(Request, self).__getattribute__(attr)
         except AttributeError:
-            return getattr(self._request, attr)
\ No newline at end of file
+            return getattr(self._request, attr)
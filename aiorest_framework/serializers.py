@@ -1,9 +1,17 @@
+import asyncio
 import copy
 import inspect
-from collections import OrderedDict
+import itertools
+from collections import OrderedDict, defaultdict
+from types import MappingProxyType
+
+import peewee
 
 from . import fields
+from .cache import LRUCache
 from .exceptions import ValidationError
+from .loaders import DataLoader
+from .timing import phase
 
 __author__ = 'vadim'
 
@@ -13,12 +21,59 @@ class Options:
         self.model = None
         self.fields = ()
         self.validators = {}
+        # Maximum number of representations cached per serializer class;
+        # `None` disables the cache.
+        self.representation_cache = None
+        self.cache_key_field = 'id'
+        # Column that changes on every write, e.g. 'updated_at'. Without
+        # one the instance data is hashed.
+        self.cache_version_field = None
+        # Async manager (with an `execute(query)` coroutine) running the
+        # queries of nested serializers; they run synchronously without one.
+        self.objects = None
+        # Evaluate the async fields of an object (and, for a page, their
+        # columns) concurrently, at most `max_concurrent_fields` at a time.
+        self.concurrent_fields = False
+        self.max_concurrent_fields = None
+        # Model columns always selected by `select_columns()`, e.g. those
+        # read by method fields.
+        self.required_columns = ()
 
         meta_kwargs = {key: value for key, value in meta.__dict__.items()
                        if not key.startswith('__')}
         self.__dict__.update(meta_kwargs)
 
 
+class FieldPlan:
+    """
+    Field layout of a serializer class.
+
+    Compiled once by `SerializerMetaclass` and shared, read-only, by every
+    instance of the class. Fields are bound to the serializer class rather
+    than to an instance, so nothing here is mutated at request time.
+    """
+    __slots__ = ('fields', 'writable_fields', 'field_names', 'attr_names')
+
+    def __init__(self, fields, writable_fields=None):
+        self.fields = MappingProxyType(fields)
+        if writable_fields is None:
+            writable_fields = OrderedDict([
+                [name, field] for name, field in fields.items()
+                if not field.read_only or field.default
+            ])
+        self.writable_fields = MappingProxyType(writable_fields)
+        self.field_names = tuple(fields)
+        self.attr_names = tuple(field.get_attr_name() for field in fields.values())
+
+    # Plans are immutable, so copies of a serializer (e.g. a restricted one
+    # declared as a nested field) share theirs.
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
 class SerializerMetaclass(type):
     @classmethod
     def _get_declared_fields(cls, bases, attrs):
@@ -36,7 +91,33 @@ class SerializerMetaclass(type):
             if hasattr(base, '_declared_fields'):
                 declared_fields = list(base._declared_fields.items()) + declared_fields
 
-        return OrderedDict(declared_fields)
+        # Every class gets its own copies, so binding them below never
+        # touches the fields of a base serializer.
+        return OrderedDict([
+            [field_name, copy.deepcopy(field)] for field_name, field in declared_fields
+        ])
+
+    @classmethod
+    def _get_plan(cls, new_class):
+        meta = getattr(new_class, '_meta', None)
+        if meta is None:
+            return FieldPlan(OrderedDict())
+
+        plan_fields = OrderedDict()
+        for field_name in meta.fields:
+            field = new_class._declared_fields.get(field_name)
+            assert field is not None, (
+                'Field `{field}` is listed in `Meta.fields` but is not declared '
+                'on `{serializer}`.'.format(field=field_name, serializer=new_class.__name__)
+            )
+            field.bind(new_class, field_name)
+            plan_fields[field_name] = field
+
+        plan = FieldPlan(plan_fields)
+        for field_name, validators in meta.validators.items():
+            plan.writable_fields[field_name].validators = validators
+
+        return plan
 
     def __new__(cls, name, bases, attrs):
         meta = attrs.get('Meta')
@@ -45,11 +126,32 @@ class SerializerMetaclass(type):
 
         attrs['_declared_fields'] = cls._get_declared_fields(bases, attrs)
 
-        return super(SerializerMetaclass, cls).__new__(cls, name, bases, attrs)
+        new_class = super(SerializerMetaclass, cls).__new__(cls, name, bases, attrs)
+        new_class._plan = cls._get_plan(new_class)
+        new_class._restricted_plans = LRUCache(max_entries=new_class.max_restricted_plans)
+        new_class._representation_cache = cls._get_representation_cache(new_class)
+        return new_class
+
+    @classmethod
+    def _get_representation_cache(cls, new_class):
+        meta = getattr(new_class, '_meta', None)
+        if meta is None or not meta.representation_cache:
+            return None
+        return LRUCache(max_entries=meta.representation_cache)
 
 
 class BaseSerializer(fields.Field):
-    LIST_SERIALIZER_KWARGS = []
+    LIST_SERIALIZER_KWARGS = ['initial_data', 'partial', 'required', 'read_only', 'context']
+    _plan = FieldPlan(OrderedDict())
+    _restricted_plans = LRUCache(max_entries=0)
+    # Restricted plans are built from client input (`?fields=`), so only the
+    # most recently used ones are kept.
+    max_restricted_plans = 64
+    _representation_cache = None
+
+    default_error_messages = dict(fields.Field.default_error_messages, **{
+        'unknown_fields': 'неизвестные поля: {names}',
+    })
 
     def __new__(cls, *args, **kwargs):
         # We override this method in order to automagically create
@@ -58,9 +160,16 @@ class BaseSerializer(fields.Field):
             return cls.many_init(*args, **kwargs)
         return super(BaseSerializer, cls).__new__(cls)
 
-    def __init__(self, instance=None, *args, **kwargs):
+    def __init__(self, instance=None, *args, context=None, fields=None, exclude=None, **kwargs):
         super(BaseSerializer, self).__init__(*args, **kwargs)
         self.instance = instance
+        if fields is not None or exclude is not None:
+            self._plan = self.get_restricted_plan(fields, exclude)
+        if self.customizes_fields():
+            self._plan = self.get_custom_plan()
+        # Per-request state, e.g. the request and its data loaders. Pass the
+        # same dict to every serializer of a request to share loaders.
+        self.context = {} if context is None else context
         kwargs.update(name=self.__class__.__name__)
 
     @classmethod
@@ -81,33 +190,142 @@ class BaseSerializer(fields.Field):
             return CustomListSerializer(*args, **kwargs)
         """
         # allow_empty = kwargs.pop('allow_empty', None)
+        max_concurrency = kwargs.pop('max_concurrency', None)
+        # The list and its child share one context, and so their loaders.
+        if kwargs.get('context') is None:
+            kwargs['context'] = {}
         child_serializer = cls(*args, **kwargs)
         list_kwargs = {
             'child': child_serializer,
         }
         # if allow_empty is not None:
         #     list_kwargs['allow_empty'] = allow_empty
-        # list_kwargs.update({
-        #    key: value for key, value in kwargs.items()
-        #    if key in cls.LIST_SERIALIZER_KWARGS
-        # })
+        if max_concurrency is not None:
+            list_kwargs['max_concurrency'] = max_concurrency
+        list_kwargs.update({
+            key: value for key, value in kwargs.items()
+            if key in cls.LIST_SERIALIZER_KWARGS
+        })
         list_serializer_class = getattr(cls.Meta, 'list_serializer_class', ListSerializer)
         return list_serializer_class(*args, **list_kwargs)
 
-    def get_fields(self):
-        return OrderedDict([[field, self.build_field(field, self)]
-                            for field in self._meta.fields])
+    @classmethod
+    def get_restricted_plan(cls, fields=None, exclude=None):
+        """
+        Returns the plan of the class restricted to the names of `fields`,
+        minus those of `exclude`, in `Meta.fields` order. Only the fields
+        represented are restricted: validation still covers every writable
+        field. The last `max_restricted_plans` plans are cached per class.
+        Unknown names raise `ValidationError`.
+        """
+        plan = cls._plan
+        names = set(plan.field_names if fields is None else fields)
+        excluded = set(exclude or ())
+        unknown = (names | excluded).difference(plan.field_names)
+        if unknown:
+            message = cls.default_error_messages['unknown_fields']
+            raise ValidationError({
+                'fields': [message.format(names=', '.join(sorted(unknown)))]
+            })
 
-    def build_field(self, name, parent):
-        field = self._declared_fields.get(name)
-        field and field.bind(self, name)
-        return field
+        key = tuple(name for name in plan.field_names if name in names and name not in excluded)
+        restricted = cls._restricted_plans.get(key)
+        if restricted is None:
+            if key == plan.field_names:
+                restricted = plan
+            else:
+                restricted = FieldPlan(
+                    OrderedDict([[name, plan.fields[name]] for name in key]),
+                    writable_fields=plan.writable_fields,
+                )
+            cls._restricted_plans.set(key, restricted)
+        return restricted
+
+    def select_columns(self, model=None):
+        """
+        Returns the peewee columns of `model` (`Meta.model` by default) the
+        serialized fields read, for `model.select(*columns)`. The primary
+        key, the `Meta.cache_version_field` and `Meta.required_columns` are
+        always included; fields that are not model columns, such as method
+        fields, select nothing by themselves.
+        """
+        meta = self._meta
+        model = model or meta.model
+        model_fields = model._meta.fields
+
+        names = [model._meta.primary_key.name]
+        if meta.cache_version_field:
+            names.append(meta.cache_version_field)
+        names.extend(meta.required_columns)
+        names.extend(self._plan.attr_names)
+
+        columns = []
+        seen = set()
+        for name in names:
+            column = model_fields.get(name)
+            if column is not None and name not in seen:
+                seen.add(name)
+                columns.append(column)
+        return columns
+
+    def with_context(self, context):
+        """
+        Returns a shallow copy of the serializer using `context`. Nested
+        serializers are shared by every instance of their parent class, so
+        they are run through such a copy to see the parent's context.
+        """
+        if context is self.context:
+            return self
+        serializer = copy.copy(self)
+        serializer.context = context
+        return serializer
+
+    def get_loader(self, key, batch_load, **kwargs):
+        """
+        Returns the `DataLoader` stored under `key` in the context, creating
+        it with `batch_load` on first use. Serializers sharing a context
+        share its loaders, and so batches and memoized values.
+        """
+        loaders = self.context.setdefault('loaders', {})
+        loader = loaders.get(key)
+        if loader is None:
+            loader = loaders[key] = DataLoader(batch_load, **kwargs)
+        return loader
+
+    @property
+    def fields(self):
+        return self._plan.fields
+
+    @property
+    def writable_fields(self):
+        return self._plan.writable_fields
+
+    def get_fields(self):
+        return self._plan.fields
 
     def get_writable_fields(self):
-        return OrderedDict([
-            [field.name, field] for field in self.fields.values()
-            if not field.read_only or field.default
-        ])
+        return self._plan.writable_fields
+
+    def customizes_fields(self):
+        cls = type(self)
+        return (cls.get_fields is not BaseSerializer.get_fields or
+                cls.get_writable_fields is not BaseSerializer.get_writable_fields)
+
+    def get_custom_plan(self):
+        """
+        Builds the plan of an instance whose class overrides `get_fields()`
+        or `get_writable_fields()`. Such serializers pay for a plan per
+        instance instead of sharing the one of their class.
+        """
+        plan_fields = OrderedDict(self.get_fields())
+        writable_fields = None
+        if type(self).get_writable_fields is not BaseSerializer.get_writable_fields:
+            writable_fields = OrderedDict(self.get_writable_fields())
+
+        for name, field in itertools.chain(plan_fields.items(), (writable_fields or {}).items()):
+            if field.name is None:
+                field.bind(type(self), name)
+        return FieldPlan(plan_fields, writable_fields)
 
     @property
     async def data(self):
@@ -122,12 +340,13 @@ class BaseSerializer(fields.Field):
             raise AssertionError(msg)
 
         if not hasattr(self, '_data'):
-            if self.instance is not None and not self._errors:
-                self._data = await self.to_representation(self.instance)
-            elif self.validated_data and not self._errors:
-                self._data = await self.to_representation(self.validated_data)
-            else:
-                self._data = self.initial_data
+            with phase('serialize'):
+                if self.instance is not None and not self._errors:
+                    self._data = await self.to_representation(self.instance)
+                elif self.validated_data and not self._errors:
+                    self._data = await self.to_representation(self.validated_data)
+                else:
+                    self._data = self.initial_data
 
         return self._data
 
@@ -138,17 +357,18 @@ class BaseSerializer(fields.Field):
         )
 
         if not self.validated_data:
-            try:
-                self.validated_data = await self.run_validation(self.initial_data)
-            except ValidationError as exc:
-                self._errors = exc.detail
+            with phase('validate'):
+                try:
+                    self.validated_data = await self.run_validation(self.initial_data)
+                except ValidationError as exc:
+                    self._errors = exc.detail
 
         if self._errors and raise_exception:
             raise ValidationError(self._errors)
 
         return not bool(self._errors)
 
-    async def run_validation(self, data):
+    async def run_validation(self, data, parent=None):
         data = data if isinstance(data, dict) else {}
 
         ret = OrderedDict()
@@ -157,13 +377,17 @@ class BaseSerializer(fields.Field):
         for name, field in check_fields.items():
             value = data.get(name)
             try:
-                ret[field.name] = await field.run_validation(value)
+                value = field.run_validation(value, self)
+                if field.is_async:
+                    value = await fields.resolve(value)
+                ret[field.name] = value
             except ValidationError as exc:
                 errors[name] = exc.detail
 
-        self._errors = errors
-        if self._errors:
-            raise ValidationError(self._errors)
+        # Errors stay local: `is_valid()` records them on the serializer, and
+        # a shared list child must not be written to by concurrent items.
+        if errors:
+            raise ValidationError(errors)
 
         return ret
 
@@ -197,25 +421,450 @@ class BaseSerializer(fields.Field):
         """
         Object instance -> Dict of primitive datatypes.
         """
+        cache = self._representation_cache
+        key = cache is not None and self.get_representation_key(instance)
+        if key:
+            cached = cache.get(key)
+            if cached is not None:
+                return thaw_row(cached)
+
+        ret = await self.represent(instance)
+        if key:
+            cache.set(key, freeze_row(ret))
+        return ret
+
+    def get_representation_key(self, instance):
+        """
+        Returns the `(primary key, version)` the representation of `instance`
+        is cached under, or `None` if it cannot be cached. Without a
+        `Meta.cache_version_field` the version is a hash of the instance data.
+
+        Callers may modify what they get: flat rows are copied in and out of
+        the cache, and only rows holding containers, e.g. from nested or
+        method fields, are deep-copied.
+
+        Cached representations are only as fresh as the version: values
+        computed from other rows, nested serializers included, or from the
+        request are not tracked.
+        """
+        meta = self._meta
+        data = get_instance_data(instance)
+        pk = data.get(meta.cache_key_field)
+        if pk is None:
+            return None
+
+        if meta.cache_version_field:
+            key = pk, data.get(meta.cache_version_field)
+        else:
+            try:
+                key = pk, hash(tuple(sorted(data.items())))
+            except TypeError:
+                return None
+
+        # A restricted serializer caches its own, narrower representations.
+        if self._plan is not type(self)._plan:
+            key += (self._plan.field_names,)
+        return key
+
+    async def get_attribute_many(self, instances, parent=None):
+        """
+        Column of related objects, when the serializer is nested as a field.
+        The targets of a peewee foreign key are loaded for the whole column
+        with one `IN` query; related objects already loaded on an instance,
+        e.g. by a join, are reused.
+        """
+        instances = list(instances)
+        foreign_key = get_foreign_key(instances, self.get_attr_name())
+        if foreign_key is None:
+            return [await fields.resolve(self.get_attribute(instance, parent))
+                    for instance in instances]
+
+        name = foreign_key.name
+        keys = [get_instance_data(instance).get(name) for instance in instances]
+
+        related = {}
+        missing = set()
+        for instance, key in zip(instances, keys):
+            if key is None or key in related:
+                continue
+            obj = get_loaded_relation(instance, name)
+            if obj is None:
+                missing.add(key)
+            else:
+                related[key] = obj
+
+        missing.difference_update(related)
+        if missing:
+            to_field = get_rel_field(foreign_key)
+            for obj in await self.fetch_related(to_field, missing):
+                related[get_instance_data(obj).get(to_field.name)] = obj
+
+        return [related.get(key) for key in keys]
+
+    async def fetch_related(self, field, keys):
+        """
+        Returns the rows of the model of `field` whose `field` is one of
+        `keys`, loaded with a single query. Override to add joins or a
+        narrower projection.
+        """
+        query = get_field_model(field).select().where(field << list(keys))
+        return await self.execute_query(query)
+
+    async def execute_query(self, query):
+        objects = getattr(getattr(self, '_meta', None), 'objects', None)
+        if objects is None:
+            return list(query)
+        return list(await objects.execute(query))
+
+    async def represent(self, instance):
         ret = OrderedDict()
+        concurrent = self.is_concurrent()
+        pending = OrderedDict()
         for name, field in self.fields.items():
-            attribute = await field.get_attribute(instance)
-            ret[field.name] = attribute and await field.to_representation(attribute)
+            if field.is_async:
+                if concurrent:
+                    # Keep the slot, so the output follows `Meta.fields`.
+                    ret[name] = None
+                    pending[name] = self.represent_field(field, instance)
+                else:
+                    ret[name] = await self.represent_field(field, instance)
+            else:
+                attribute = field.get_attribute(instance, self)
+                ret[name] = attribute and field.to_representation(attribute)
+
+        if pending:
+            ret.update(zip(pending, await self.gather_fields(pending.values())))
         return ret
 
+    async def represent_field(self, field, instance):
+        if isinstance(field, BaseSerializer):
+            field = field.with_context(self.context)
+        attribute = await fields.resolve(field.get_attribute(instance, self))
+        return attribute and await fields.resolve(field.to_representation(attribute))
+
+    def is_concurrent(self):
+        meta = getattr(self, '_meta', None)
+        return meta is not None and meta.concurrent_fields
+
+    async def gather_fields(self, coroutines):
+        """
+        Runs the coroutines of the async fields concurrently, at most
+        `Meta.max_concurrent_fields` at a time, and returns their results
+        in order.
+        """
+        limit = self._meta.max_concurrent_fields
+        if not limit:
+            return await asyncio.gather(*coroutines)
+
+        semaphore = asyncio.Semaphore(limit)
+
+        async def run(coroutine):
+            async with semaphore:
+                return await coroutine
+
+        return await asyncio.gather(*[run(coroutine) for coroutine in coroutines])
+
+    async def to_representation_many(self, instances):
+        """
+        List of object instances -> List of dicts of primitive datatypes.
+
+        Works column by column: every field converts the values of all
+        instances in one call, then the columns are zipped back into rows.
+        Serializers that only override the per-object `to_representation()`
+        are served item by item.
+        """
+        if type(self).to_representation is not BaseSerializer.to_representation:
+            return [await self.to_representation(instance) for instance in instances]
+
+        instances = list(instances)
+        cache = self._representation_cache
+        if cache is None:
+            return await self.represent_many(instances)
+
+        # Only the rows missing from the cache are represented.
+        keys = [self.get_representation_key(instance) for instance in instances]
+        rows = []
+        for key in keys:
+            entry = cache.get(key) if key is not None else None
+            rows.append(None if entry is None else thaw_row(entry))
+
+        missing = [index for index, row in enumerate(rows) if row is None]
+        represented = await self.represent_many([instances[index] for index in missing])
+        for index, row in zip(missing, represented):
+            if keys[index] is not None:
+                cache.set(keys[index], freeze_row(row))
+            rows[index] = row
+
+        return rows
+
+    async def represent_many(self, instances):
+        if not self.fields:
+            return [OrderedDict() for instance in instances]
+
+        if self.is_concurrent():
+            columns = [None] * len(self.fields)
+            pending = OrderedDict()
+            for index, field in enumerate(self.fields.values()):
+                if field.is_async:
+                    pending[index] = self.represent_column(field, instances)
+                else:
+                    columns[index] = await self.represent_column(field, instances)
+            for index, column in zip(pending, await self.gather_fields(pending.values())):
+                columns[index] = column
+        else:
+            columns = [await self.represent_column(field, instances)
+                       for field in self.fields.values()]
+
+        names = self._plan.field_names
+        return [OrderedDict(zip(names, row)) for row in zip(*columns)]
+
+    async def represent_column(self, field, instances):
+        if not field.is_async:
+            return field.to_representation_many(field.get_attribute_many(instances, self))
+
+        if isinstance(field, BaseSerializer):
+            field = field.with_context(self.context)
+
+        if inspect.iscoroutinefunction(field.get_attribute_many):
+            column = await field.get_attribute_many(instances, self)
+        else:
+            column = [await fields.resolve(field.get_attribute(instance, self))
+                      for instance in instances]
+
+        if inspect.iscoroutinefunction(field.to_representation_many):
+            converted = iter(await field.to_representation_many([value for value in column if value]))
+            return [value and next(converted) for value in column]
+
+        return [value and await fields.resolve(field.to_representation(value))
+                for value in column]
+
+
+def freeze_row(row):
+    """
+    Returns the cache entry of a representation: a private copy of the row
+    and whether it holds containers, which then need a deep copy.
+    """
+    nested = any(isinstance(value, (dict, list, tuple, set)) for value in row.values())
+    return (copy.deepcopy(row) if nested else OrderedDict(row)), nested
+
+
+def thaw_row(entry):
+    row, nested = entry
+    return copy.deepcopy(row) if nested else OrderedDict(row)
+
+
+def get_instance_data(instance):
+    """
+    Returns the raw column values of a peewee model instance, or the
+    instance itself for dicts.
+    """
+    if isinstance(instance, dict):
+        return instance
+    data = getattr(instance, '__data__', None)
+    if data is None:
+        data = getattr(instance, '_data', {})
+    return data
+
+
+def get_field_model(field):
+    model = getattr(field, 'model', None)
+    if model is None:
+        model = field.model_class
+    return model
+
+
+def get_rel_field(foreign_key):
+    """
+    Returns the field of the related model a foreign key points to.
+    """
+    rel_field = getattr(foreign_key, 'rel_field', None)
+    if rel_field is None:
+        rel_field = foreign_key.to_field
+    return rel_field
+
+
+def get_foreign_key(instances, attr_name):
+    """
+    Returns the peewee `ForeignKeyField` named `attr_name` on the model of
+    `instances`, or `None` if it is not one.
+    """
+    if not instances or isinstance(instances[0], dict):
+        return None
+    meta = getattr(type(instances[0]), '_meta', None)
+    field = meta.fields.get(attr_name) if meta is not None else None
+    return field if isinstance(field, peewee.ForeignKeyField) else None
+
+
+def get_backref(instances, attr_name):
+    """
+    Returns the foreign key behind the back-reference `attr_name` of the
+    model of `instances`, or `None` if it is not one.
+    """
+    if not instances or isinstance(instances[0], dict):
+        return None
+    model = type(instances[0])
+    meta = getattr(model, '_meta', None)
+    if meta is None or attr_name in meta.fields:
+        return None
+    field = getattr(getattr(model, attr_name, None), 'field', None)
+    return field if isinstance(field, peewee.ForeignKeyField) else None
+
+
+def get_loaded_relation(instance, name):
+    """
+    Returns the related object peewee already holds for the foreign key
+    `name` of `instance`, without querying.
+    """
+    loaded = getattr(instance, '__rel__', None)
+    if loaded is None:
+        loaded = getattr(instance, '_obj_cache', {})
+    return loaded.get(name)
+
 
 class Serializer(BaseSerializer, metaclass=SerializerMetaclass):
-    def __init__(self, *args, **kwargs):
-        super(Serializer, self).__init__(*args, **kwargs)
-        self.fields = self.get_fields()
-        self.writable_fields = self.get_writable_fields()
-        for field_name, validators in self._meta.validators.items():
-            self.writable_fields[field_name].validators = validators
+    pass
+
+
+ALL_FIELDS = '__all__'
+
+AUTO_FIELDS = tuple(
+    getattr(peewee, name) for name in ('AutoField', 'BigAutoField', 'PrimaryKeyField')
+    if hasattr(peewee, name)
+)
+
+
+def get_model_fields(model):
+    """
+    Returns the peewee fields of `model` in declaration order, by name.
+    """
+    return OrderedDict([[field.name, field] for field in model._meta.sorted_fields])
+
+
+class ModelSerializerMetaclass(SerializerMetaclass):
+    @classmethod
+    def _get_plan(cls, new_class):
+        meta = getattr(new_class, '_meta', None)
+        if meta is not None and 'Meta' in new_class.__dict__:
+            assert meta.model is not None, (
+                '`{serializer}` is missing `Meta.model`.'.format(serializer=new_class.__name__)
+            )
+            model_fields = get_model_fields(meta.model)
+            declared = new_class._declared_fields
+            if not meta.fields or meta.fields == ALL_FIELDS:
+                meta.fields = tuple(model_fields) + tuple(
+                    name for name in declared if name not in model_fields
+                )
+            for field_name in meta.fields:
+                if field_name not in declared and field_name in model_fields:
+                    declared[field_name] = new_class.build_field(model_fields[field_name])
+
+        return super(ModelSerializerMetaclass, cls)._get_plan(new_class)
+
+
+class ModelSerializer(BaseSerializer, metaclass=ModelSerializerMetaclass):
+    """
+    Serializer whose fields default to the columns of the peewee
+    `Meta.model`, built once when the class is created. `Meta.fields` picks
+    and orders them ('__all__' or empty for every column); declared fields
+    take precedence over the generated ones.
+
+    `get_query()` selects only the columns of the serialized fields and,
+    when every field reads a plain column, fetches the rows as tuples: no
+    model instance is built, and the tuples are transposed straight into
+    the columns `represent_many()` works on.
+    """
+    serializer_field_mapping = OrderedDict([
+        [peewee.ForeignKeyField, fields.PrimaryKeyRelatedField],
+        [peewee.SmallIntegerField, fields.SmallIntegerField],
+        [peewee.IntegerField, fields.IntegerField],
+        [peewee.CharField, fields.CharField],
+        [peewee.TextField, fields.CharField],
+        [peewee.DateTimeField, fields.DateTimeField],
+        [peewee.BooleanField, fields.BooleanField],
+    ])
+
+    @classmethod
+    def build_field(cls, model_field):
+        """
+        Returns the serializer field for the peewee `model_field`. Columns of
+        an unmapped type are passed through as is.
+        """
+        kwargs = {}
+        if isinstance(model_field, AUTO_FIELDS) or getattr(model_field, 'sequence', None):
+            kwargs['read_only'] = True
+        elif model_field.null or model_field.default is not None:
+            kwargs['required'] = False
+
+        if model_field.choices:
+            return fields.ChoiceField(model_field.choices, **kwargs)
+
+        field_class = fields.Field
+        for klass in type(model_field).__mro__:
+            if klass in cls.serializer_field_mapping:
+                field_class = cls.serializer_field_mapping[klass]
+                break
+
+        if issubclass(field_class, fields.CharField) and getattr(model_field, 'max_length', None):
+            kwargs['max_length'] = model_field.max_length
+        if issubclass(field_class, fields.PrimaryKeyRelatedField):
+            # Keys are converted like the primary key they point to, be it
+            # an integer, a string or a UUID.
+            kwargs['key_field'] = cls.build_field(get_rel_field(model_field))
+        return field_class(**kwargs)
+
+    def reads_columns_only(self):
+        """
+        Returns `True` if every serialized field is a plain, synchronous
+        read of a model column, so rows can be fetched as tuples.
+        """
+        model_fields = self._meta.model._meta.fields
+        return all(
+            not field.is_async and field.get_attr_name() in model_fields and
+            type(field).get_attribute in (fields.Field.get_attribute,
+                                          fields.PrimaryKeyRelatedField.get_attribute)
+            for field in self.fields.values()
+        )
+
+    def get_query(self, query=None):
+        """
+        Returns `query` (`Meta.model.select()` by default) projected on
+        `select_columns()`, as tuples when `reads_columns_only()`. Tuple rows
+        must come from this query, as their layout follows its columns.
+        """
+        if query is None:
+            query = self._meta.model.select()
+        query = query.select(*self.select_columns())
+        if self.reads_columns_only():
+            return query.tuples()
+        return query
+
+    async def represent(self, instance):
+        if isinstance(instance, tuple):
+            return (await self.represent_many([instance]))[0]
+        return await super(ModelSerializer, self).represent(instance)
+
+    async def represent_many(self, instances):
+        if not instances or not isinstance(instances[0], tuple):
+            return await super(ModelSerializer, self).represent_many(instances)
+
+        positions = {column.name: index for index, column in enumerate(self.select_columns())}
+        transposed = list(zip(*instances))
+        columns = [
+            field.to_representation_many(transposed[positions[field.get_attr_name()]])
+            for field in self.fields.values()
+        ]
+        names = self._plan.field_names
+        return [OrderedDict(zip(names, row)) for row in zip(*columns)]
 
 
 class ListSerializer(BaseSerializer, metaclass=SerializerMetaclass):
     child = None
     many = True
+    # Set to validate up to that many items at once, e.g. when fields do
+    # async lookups. `None` validates the items one after another.
+    max_concurrency = None
+    # Number of instances represented at once by `iter_representation()`.
+    stream_chunk_size = 100
 
     default_error_messages = {
         'not_a_list': 'Expected a list of items but got type "{input_type}".',
@@ -225,39 +874,168 @@ class ListSerializer(BaseSerializer, metaclass=SerializerMetaclass):
     def __init__(self, *args, **kwargs):
         self.child = kwargs.pop('child', copy.deepcopy(self.child))
         self.allow_empty = kwargs.pop('allow_empty', True)
+        self.max_concurrency = kwargs.pop('max_concurrency', self.max_concurrency)
         assert self.child is not None, '`child` is a required argument.'
         assert not inspect.isclass(self.child), '`child` has not been instantiated.'
         super(ListSerializer, self).__init__(*args, **kwargs)
 
-    def run_validation(self, data):
+    async def run_validation(self, data, parent=None):
         """
         We override the default `run_validation`, because the validation
         performed by validators and the `.validate()` method should
         be coerced into an error dictionary with a 'non_fields_error' key.
         """
+        data = self.to_python_columns(data)
+        if self.max_concurrency:
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            results = await asyncio.gather(*[
+                self.validate_item(item, semaphore) for item in data
+            ])
+        else:
+            results = [await self.validate_item(item) for item in data]
+
         ret = []
         errors = []
-        for item in data:
-            try:
-                validated = self.child.run_validation(item)
-            except ValidationError as exc:
-                errors.append(exc.detail)
-            else:
+        for validated, error in results:
+            if error is None:
                 ret.append(validated)
                 errors.append({})
+            else:
+                errors.append(error)
 
         if any(errors):
             raise ValidationError(errors)
 
         return ret
 
+    def to_python_columns(self, data):
+        """
+        Parses the input of every child field with its own `to_python_many()`,
+        e.g. `DateTimeField`, one column at a time, and returns copies of the
+        items holding the parsed values, which per-item validation then
+        accepts as they are. A column with an invalid value is left to
+        per-item validation, which reports it against its item.
+        """
+        child_fields = getattr(self.child, 'writable_fields', {})
+        columns = [
+            (name, field) for name, field in child_fields.items()
+            if not field.is_async and
+            type(field).to_python_many is not fields.Field.to_python_many
+        ]
+        if not columns or not all(isinstance(item, dict) for item in data):
+            return data
+
+        items = [dict(item) for item in data]
+        for name, field in columns:
+            present = [item for item in items if item.get(name)]
+            if not present:
+                continue
+            try:
+                parsed = field.to_python_many([item[name] for item in present])
+            except ValidationError:
+                continue
+            for item, value in zip(present, parsed):
+                if value is not None:
+                    item[name] = value
+        return items
+
+    async def validate_item(self, item, semaphore=None):
+        """
+        Returns a `(validated, error_detail)` pair for a single item.
+        """
+        if semaphore is not None:
+            async with semaphore:
+                return await self.validate_item(item)
+
+        try:
+            validated = self.child.run_validation(item, self)
+            if self.child.is_async:
+                validated = await fields.resolve(validated)
+        except ValidationError as exc:
+            return None, exc.detail
+
+        return validated, None
+
     async def to_representation(self, data):
         """
         List of object instances -> List of dicts of primitive datatypes.
         """
-        ret = []
+        return await self.child.to_representation_many(data)
 
-        for item in data:
-            ret.append(await self.child.to_representation(item))
+    def select_columns(self, model=None):
+        return self.child.select_columns(model)
 
-        return ret
+    def get_query(self, query=None):
+        return self.child.get_query(query)
+
+    def with_context(self, context):
+        serializer = super(ListSerializer, self).with_context(context)
+        if serializer is not self:
+            serializer.child = self.child.with_context(context)
+        return serializer
+
+    async def get_attribute_many(self, instances, parent=None):
+        """
+        Column of related object lists, when the serializer is nested as a
+        field over a peewee back-reference. The rows of the whole column
+        are loaded with one `IN` query and grouped by their foreign key.
+        """
+        instances = list(instances)
+        foreign_key = get_backref(instances, self.get_attr_name())
+        if foreign_key is None:
+            return [await fields.resolve(self.get_attribute(instance, parent))
+                    for instance in instances]
+
+        to_field = get_rel_field(foreign_key)
+        keys = [get_instance_data(instance).get(to_field.name) for instance in instances]
+
+        groups = defaultdict(list)
+        present = set(keys)
+        present.discard(None)
+        if present:
+            for obj in await self.child.fetch_related(foreign_key, present):
+                groups[get_instance_data(obj).get(foreign_key.name)].append(obj)
+
+        return [groups.get(key, []) for key in keys]
+
+    async def to_representation_many(self, lists):
+        """
+        Column of object lists -> column of lists of dicts, represented by
+        the child in a single pass over all of the objects.
+        """
+        lists = [list(items) for items in lists]
+        rows = iter(await self.child.to_representation_many(
+            list(itertools.chain.from_iterable(lists))
+        ))
+        return [list(itertools.islice(rows, len(items))) for items in lists]
+
+    async def iter_representation(self, data=None, chunk_size=None):
+        """
+        Iterable of object instances -> async iterator of dicts of primitive
+        datatypes, produced `chunk_size` instances at a time so that only one
+        chunk is held in memory. Pass a lazy iterable (e.g. peewee's
+        `query.iterator()`) to keep memory flat on large exports.
+        """
+        data = self.instance if data is None else data
+        chunk_size = chunk_size or self.stream_chunk_size
+
+        if hasattr(data, '__aiter__'):
+            chunk = []
+            async for item in data:
+                chunk.append(item)
+                if len(chunk) >= chunk_size:
+                    for row in await self.child.to_representation_many(chunk):
+                        yield row
+                    chunk = []
+            if chunk:
+                for row in await self.child.to_representation_many(chunk):
+                    yield row
+            return
+
+        iterator = iter(data)
+        while True:
+            chunk = list(itertools.islice(iterator, chunk_size))
+            if not chunk:
+                break
+            for row in await self.child.to_representation_many(chunk):
+                yield row
@@ -3,10 +3,49 @@ import importlib
 DEFAULTS = {
     'PAGE_SIZE': 10,
     'DEFAULT_PAGINATION_CLASS': 'aiorest_peewee.pagination.QueryPageNumberPagination',
+    'DEFAULT_RENDERER_CLASSES': (
+        'aiorest_framework.renderers.FastJSONRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'aiorest_framework.parsers.JSONParser',
+        'aiorest_framework.parsers.FormParser',
+        'aiorest_framework.parsers.MultiPartParser',
+    ),
+    'DEFAULT_CONTENT_NEGOTIATION_CLASS': 'aiorest_framework.negotiation.DefaultContentNegotiation',
+    'DEFAULT_THROTTLE_CLASSES': (),
+    # Rates per throttle scope, e.g. {'user': '100/min'}.
+    'DEFAULT_THROTTLE_RATES': {},
+    # Number of trusted proxies in front of the application. When set,
+    # throttles identify clients by the X-Forwarded-For entry that many hops
+    # from the right; otherwise the header is ignored and the peer address
+    # is used.
+    'NUM_PROXIES': None,
+    # Request bodies larger than this many bytes are rejected with 413.
+    # `None` disables the check.
+    'MAX_BODY_SIZE': 2621440,
+    # Time the phases of every request and send them as a `Server-Timing`
+    # response header.
+    'SERVER_TIMING': False,
+    # Callable `(request, view, timings)` receiving the phase durations in
+    # milliseconds of every request, e.g. for a metrics exporter.
+    'TIMING_CALLBACK': None,
+    # Output of `DateTimeField`: 'iso-8601', 'epoch' (seconds), 'epoch_ms'
+    # or a strftime format.
+    'DATETIME_FORMAT': 'iso-8601',
+    # Precision of 'iso-8601' output, as `datetime.isoformat(timespec=...)`.
+    'DATETIME_TIMESPEC': 'auto',
+    # Timezone (name or tzinfo) datetimes are converted to before output,
+    # e.g. 'UTC'. Naive datetimes are taken as UTC. `None` leaves them as is.
+    'DATETIME_TIMEZONE': None,
 }
 
 IMPORT_STRINGS = (
     'DEFAULT_PAGINATION_CLASS',
+    'DEFAULT_RENDERER_CLASSES',
+    'DEFAULT_PARSER_CLASSES',
+    'DEFAULT_CONTENT_NEGOTIATION_CLASS',
+    'DEFAULT_THROTTLE_CLASSES',
+    'TIMING_CALLBACK',
 )
 
 
@@ -0,0 +1,180 @@
+"""
+Provides various throttling policies.
+"""
+import time
+
+from .cache import LocMemCache
+from .settings import api_settings
+
+__author__ = 'vadim'
+
+
+class ImproperlyConfigured(Exception):
+    pass
+
+
+class BaseThrottle:
+    """
+    Rate throttling of requests.
+    """
+
+    async def allow_request(self, request, view):
+        """
+        Return `True` if the request should be allowed, `False` otherwise.
+        """
+        raise NotImplementedError('.allow_request() must be overridden')
+
+    def wait(self):
+        """
+        Optionally, return a recommended number of seconds to wait before
+        the next request.
+        """
+        return None
+
+
+class RateThrottle(BaseThrottle):
+    """
+    Base of the rate limiters. Each client is identified by `key`: 'user'
+    (the user id, falling back to the IP for anonymous requests) or 'ip';
+    override `get_ident()` for anything else.
+
+    The rate is looked up in `DEFAULT_THROTTLE_RATES` under the view's
+    `throttle_scope`, or the throttle's own `scope`, unless `rate` is set,
+    and has the form '<requests>/<period>' with the period one of
+    's', 'sec', 'm', 'min', 'h', 'hour', 'd' or 'day'.
+
+    X-Forwarded-For is only trusted when the `NUM_PROXIES` setting says how
+    many proxies in front of the application append to it.
+
+    State lives in `cache`, an in-process `LocMemCache` shared by every
+    instance of the class. Set it to a shared `BaseCache` backend to
+    throttle across workers. State is updated with `compare_and_set()`, so
+    concurrent requests of one client are never let through on the same
+    state; a request losing the race more than `max_retries` times is
+    throttled.
+    """
+    cache = LocMemCache(max_entries=100000, timeout=None)
+    cache_format = 'throttle:{throttle}:{scope}:{ident}'
+    timer = time.time
+
+    scope = None
+    rate = None
+    key = 'user'
+    max_retries = 8
+
+    PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+    def __init__(self):
+        self._wait = None
+
+    def get_scope(self, view):
+        return getattr(view, 'throttle_scope', None) or self.scope
+
+    def get_rate(self, scope):
+        if self.rate is not None:
+            return self.rate
+        try:
+            return api_settings.DEFAULT_THROTTLE_RATES[scope]
+        except KeyError:
+            raise ImproperlyConfigured(
+                'No default throttle rate set for "{scope}" scope.'.format(scope=scope)
+            )
+
+    def parse_rate(self, rate):
+        """
+        Given the request rate string, return a two tuple of:
+        <allowed number of requests>, <period of time in seconds>
+        """
+        num, period = rate.split('/')
+        return int(num), self.PERIODS[period[0]]
+
+    def get_ident(self, request, view):
+        if self.key == 'user':
+            user = getattr(request, 'user', None)
+            if user is not None and getattr(user, 'id', None) is not None:
+                return 'user:{id}'.format(id=user.id)
+
+        remote = getattr(request, 'remote', None)
+        num_proxies = api_settings.NUM_PROXIES
+        forwarded_for = request.headers.get('X-Forwarded-For')
+        if num_proxies and forwarded_for:
+            # Entries left of the ones our proxies appended are client
+            # supplied and cannot be trusted.
+            addresses = forwarded_for.split(',')
+            remote = addresses[-min(num_proxies, len(addresses))].strip()
+        return 'ip:{remote}'.format(remote=remote)
+
+    async def allow_request(self, request, view):
+        scope = self.get_scope(view)
+        num_requests, duration = self.parse_rate(self.get_rate(scope))
+        key = self.cache_format.format(
+            throttle=type(self).__name__, scope=scope, ident=self.get_ident(request, view)
+        )
+
+        for attempt in range(self.max_retries):
+            now = self.timer()
+            state = await self.cache.get(key)
+            allowed, new_state, self._wait = self.consume(state, now, num_requests, duration)
+            if await self.cache.compare_and_set(key, state, new_state, timeout=duration * 2):
+                return allowed
+
+        self._wait = None
+        return False
+
+    def consume(self, state, now, num_requests, duration):
+        """
+        Account for one request. Returns `(allowed, new_state, wait)`.
+        Implementations must run in constant time.
+        """
+        raise NotImplementedError('.consume() must be overridden')
+
+    def wait(self):
+        return self._wait
+
+
+class TokenBucketThrottle(RateThrottle):
+    """
+    Token bucket holding `num_requests` tokens, refilled continuously over
+    `duration`. Allows short bursts up to the bucket size.
+    """
+
+    def consume(self, state, now, num_requests, duration):
+        refill_rate = num_requests / duration
+        if state is None:
+            tokens = float(num_requests)
+        else:
+            tokens, updated = state
+            tokens = min(float(num_requests), tokens + (now - updated) * refill_rate)
+
+        if tokens >= 1:
+            return True, (tokens - 1, now), None
+        return False, (tokens, now), (1 - tokens) / refill_rate
+
+
+class SlidingWindowThrottle(RateThrottle):
+    """
+    Sliding window counter: the count of the previous fixed window is
+    weighted by how much of it still overlaps the sliding window.
+    """
+
+    def consume(self, state, now, num_requests, duration):
+        window = now - now % duration
+        if state is None:
+            current, previous = 0, 0
+        else:
+            state_window, current, previous = state
+            if state_window != window:
+                previous = current if window - state_window == duration else 0
+                current = 0
+
+        elapsed = now - window
+        weight = 1 - elapsed / duration
+        if previous * weight + current < num_requests:
+            return True, (window, current + 1, previous), None
+
+        if current >= num_requests or not previous:
+            wait = duration - elapsed
+        else:
+            # Solve previous * (1 - t / duration) + current < num_requests for t.
+            wait = duration * (1 - (num_requests - current) / previous) - elapsed
+        return False, (window, current, previous), max(wait, 0)
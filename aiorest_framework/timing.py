@@ -0,0 +1,77 @@
+"""
+Per-phase request timing.
+
+`APIView` activates a `Timer` for the current request when timing is enabled;
+`phase()` blocks anywhere down the call chain (permission checks, the handler,
+serializer validation and representation, rendering) then record into it.
+Without an active timer `phase()` only costs a context variable lookup.
+"""
+import contextvars
+import time
+from collections import OrderedDict
+
+__author__ = 'vadim'
+
+_current_timer = contextvars.ContextVar('aiorest_framework_timer', default=None)
+
+
+class Timer:
+    def __init__(self):
+        self.phases = OrderedDict()
+
+    def add(self, name, duration_ns):
+        self.phases[name] = self.phases.get(name, 0) + duration_ns
+
+    def activate(self):
+        """
+        Make this timer the one `phase()` records into. Returns a token for
+        `deactivate()`.
+        """
+        return _current_timer.set(self)
+
+    @staticmethod
+    def deactivate(token):
+        _current_timer.reset(token)
+
+    def as_milliseconds(self):
+        return OrderedDict([
+            [name, duration_ns / 1e6] for name, duration_ns in self.phases.items()
+        ])
+
+    def server_timing_header(self):
+        """
+        Format the phases as a `Server-Timing` header value, e.g.
+        `permissions;dur=0.042, handler;dur=12.310`.
+        """
+        return ', '.join(
+            '{name};dur={duration:.3f}'.format(name=name, duration=duration)
+            for name, duration in self.as_milliseconds().items()
+        )
+
+
+def get_current_timer():
+    return _current_timer.get()
+
+
+class phase:
+    """
+    Context manager adding the time spent in its block to the active timer
+    under `name`. Phases may nest; each one is reported separately.
+
+        with phase('validate'):
+            ...
+    """
+    __slots__ = ('name', 'timer', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.timer = _current_timer.get()
+        if self.timer is not None:
+            self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.timer is not None:
+            self.timer.add(self.name, time.perf_counter_ns() - self.start)
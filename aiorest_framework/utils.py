@@ -1,5 +1,7 @@
 import datetime
+import functools
 import re
+from email.utils import format_datetime, parsedate_to_datetime
 
 import peewee
 from pytz import utc, FixedOffset
@@ -27,6 +29,19 @@ def parse_datetime(value):
     """
     match = datetime_re.match(value)
     if match:
+        # Fast path: `datetime_re` decides what is accepted, `fromisoformat()`
+        # then builds the canonical layouts in C. Layouts it rejects, such as
+        # single-digit months, are built from the match below.
+        try:
+            parsed = datetime.datetime.fromisoformat(value)
+        except ValueError:
+            pass
+        else:
+            offset = parsed.utcoffset()
+            if offset is None:
+                return parsed
+            return parsed.replace(tzinfo=get_fixed_timezone(offset))
+
         kw = match.groupdict()
         if kw['microsecond']:
             kw['microsecond'] = kw['microsecond'].ljust(6, '0')
@@ -44,18 +59,82 @@ def parse_datetime(value):
         return datetime.datetime(**kw)
 
 
+def parse_datetimes(values):
+    """
+    `parse_datetime()` over a list of strings, e.g. a `many=True` payload.
+    Returns a list with the parsed datetime, or None, of every value; a
+    value that is well formatted but not a valid datetime raises ValueError.
+    """
+    parsed = {}
+    result = []
+    for value in values:
+        # Ingest payloads often repeat timestamps; parse each one once.
+        try:
+            result.append(parsed[value])
+        except KeyError:
+            result.append(parsed.setdefault(value, parse_datetime(value)))
+    return result
+
+
+@functools.lru_cache(maxsize=None)
 def get_fixed_timezone(offset):
     """
-    Returns a tzinfo instance with a fixed offset from UTC.
+    Returns a tzinfo instance with a fixed offset from UTC. Instances are
+    cached, as only a handful of distinct offsets ever occur.
     """
     if isinstance(offset, datetime.timedelta):
-        offset = offset.seconds // 60
-    sign = '-' if offset < 0 else '+'
-    hhmm = '%02d%02d' % divmod(abs(offset), 60)
-    name = sign + hhmm
+        offset = int(offset.total_seconds()) // 60
     return FixedOffset(offset)
 
 
+def quote_etag(etag):
+    """
+    Wrap `etag` in double quotes unless it is already a quoted (or weak) tag.
+    """
+    if etag.startswith(('"', 'W/"')):
+        return etag
+    return '"%s"' % etag
+
+
+def parse_etags(header):
+    """
+    Returns the entity tags of an If-None-Match header, with any weak
+    prefix removed for weak comparison. '*' is returned as is.
+    """
+    etags = []
+    for etag in header.split(','):
+        etag = etag.strip()
+        if etag.startswith('W/'):
+            etag = etag[2:]
+        if etag:
+            etags.append(etag)
+    return etags
+
+
+def http_date(value):
+    """
+    Format a datetime as an HTTP date. Naive datetimes are taken as UTC.
+    """
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=utc)
+    return format_datetime(value.astimezone(datetime.timezone.utc), usegmt=True)
+
+
+def parse_http_date(value):
+    """
+    Returns the aware datetime of an HTTP date, or `None` if it is malformed.
+    """
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if parsed is None:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=utc)
+    return parsed
+
+
 async def get_object_or_404(objects, *args, **kwargs):
     try:
         obj = await objects.get(*args, **kwargs)
@@ -1,55 +1,500 @@
-import json
 import asyncio
+import collections
+import hashlib
+import inspect
 import logging
+from urllib.parse import urlencode
 
 from aiohttp import web
 
-from .exceptions import PermissionDenied, APIException
-from .status import HTTP_200_OK
+from .exceptions import PermissionDenied, APIException, Throttled
+from .settings import api_settings
+from .status import HTTP_200_OK, HTTP_304_NOT_MODIFIED
 from .request import Request
+from .timing import Timer, phase
+from .utils import quote_etag, parse_etags, http_date, parse_http_date
 
 __author__ = 'vadim'
 
+logger = logging.getLogger(__name__)
+
+CachedResponse = collections.namedtuple(
+    'CachedResponse', ['status', 'body', 'content_type', 'charset', 'headers']
+)
+
+
+def is_stream(data):
+    """
+    Return `True` if `data` has to be written as a streaming response: it is
+    an async iterator (e.g. `ListSerializer.iter_representation()`) or a
+    dict, such as a paginated envelope, holding one.
+    """
+    if hasattr(data, '__aiter__'):
+        return True
+    if isinstance(data, dict):
+        return any(hasattr(value, '__aiter__') for value in data.values())
+    return False
+
 
 class APIView(web.View):
     permission_classes = []
+    # Run the `has_permission()` checks concurrently, denying as soon as
+    # the first one fails. Only worth it for checks that await I/O.
+    concurrent_permission_checks = False
+    throttle_classes = api_settings.DEFAULT_THROTTLE_CLASSES
+    renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
+    parser_classes = api_settings.DEFAULT_PARSER_CLASSES
+    content_negotiation_class = api_settings.DEFAULT_CONTENT_NEGOTIATION_CLASS
+    # Chunks of a streaming response are buffered up to this many bytes
+    # before being written to the transport.
+    stream_buffer_size = 64 * 1024
+    server_timing = api_settings.SERVER_TIMING
+    # Answer GET/HEAD requests carrying If-None-Match/If-Modified-Since with
+    # 304 Not Modified. Validators come from `get_etag()`/`get_last_modified()`
+    # when the view defines them, otherwise from a hash of the rendered body.
+    conditional = False
+
+    # Server-side cache of encoded GET responses. Set to a `BaseCache`
+    # backend, e.g. `LocMemCache(max_size=64 * 1024 * 1024)`, shared by all
+    # requests to the view.
+    cache_backend = None
+    cache_timeout = 60
+    # What the cache key is made of: 'path', 'query', 'user', or
+    # 'header:<Name>'. The accepted media type is always part of the key.
+    cache_key_parts = ('path', 'query')
+    # Entries of views sharing a namespace are invalidated together; defaults
+    # to the view's dotted class name.
+    cache_namespace = None
+
+    # Query parameters holding comma-separated field names, restricting the
+    # serialized fields (see `get_fieldset()`).
+    fields_query_param = 'fields'
+    exclude_query_param = 'exclude'
 
     def __init__(self, request):
         super(APIView, self).__init__(request)
-        self._request = Request(self._request)
+        self._request = Request(
+            self._request,
+            parsers=self.get_parsers(),
+            negotiator=self.get_content_negotiator(),
+        )
         self.status_code = HTTP_200_OK
+        self.accepted_renderer = None
+        # Extra headers sent with the response.
+        self.headers = {}
+        self.timer = None
+        self.cache_key = None
 
     @asyncio.coroutine
     def __iter__(self):
+        self.timer = self.get_timer()
+        if self.timer is None:
+            return (yield from self.handle())
+
+        token = self.timer.activate()
         try:
-            yield from self.check_permissions()
-            data = yield from super(APIView, self).__iter__()
+            response = yield from self.handle()
+        finally:
+            self.timer.deactivate(token)
+
+        yield from self.report_timings(self.timer)
+        return response
+
+    @asyncio.coroutine
+    def handle(self):
+        try:
+            self.accepted_renderer = self.perform_content_negotiation()
+            if self.throttle_classes:
+                with phase('throttles'):
+                    yield from self.check_throttles()
+            with phase('permissions'):
+                yield from self.check_permissions()
+            if self.is_conditional():
+                with phase('validators'):
+                    not_modified = yield from self.check_validators()
+                if not_modified:
+                    return self.not_modified_response()
+            if self.is_cacheable():
+                cached = yield from self.get_cached_response()
+                if cached is not None:
+                    return self.cached_response(cached)
+            with phase('handler'):
+                data = yield from super(APIView, self).__iter__()
         except APIException as exc:
             data = exc.detail
             self.status_code = exc.status_code
+            if isinstance(exc, Throttled) and exc.wait is not None:
+                self.headers['Retry-After'] = str(exc.wait)
+
+        renderer = self.accepted_renderer or self.get_renderers()[0]
+
+        if is_stream(data):
+            return (yield from self.stream_response(renderer, data))
 
-        logging.debug(json.dumps(data))
+        with phase('render'):
+            body = renderer.render(data)
+        if body is not None and logger.isEnabledFor(logging.DEBUG):
+            logger.debug(body.decode(renderer.charset))
 
+        if body is not None and self.status_code == HTTP_200_OK and \
+                self.is_conditional() and 'ETag' not in self.headers:
+            self.headers['ETag'] = quote_etag(hashlib.blake2b(body, digest_size=16).hexdigest())
+
+        if body is not None and self.status_code == HTTP_200_OK and self.is_cacheable():
+            yield from self.cache_response(CachedResponse(
+                self.status_code, body, renderer.media_type, renderer.charset, dict(self.headers)
+            ))
+
+        if self.is_conditional() and self.is_not_modified():
+            return self.not_modified_response()
+
+        self.add_timing_header()
         return web.Response(
-            body=json.dumps(data).encode('utf-8') if data is not None else None,
-            content_type='application/json',
+            body=body,
+            content_type=renderer.media_type,
+            charset=renderer.charset,
             status=self.status_code,
+            headers=self.headers,
+        )
+
+    async def stream_response(self, renderer, data):
+        """
+        Write `data` as chunked output of `renderer`, so the full body is
+        never built in memory. Errors raised once streaming has started can
+        no longer change the status code; they abort the response.
+        """
+        self.add_timing_header()
+        response = web.StreamResponse(status=self.status_code, headers=self.headers)
+        response.content_type = renderer.media_type
+        response.charset = renderer.charset
+        response.enable_chunked_encoding()
+        await response.prepare(self.request._request)
+
+        with phase('render'):
+            buffer = bytearray()
+            async for chunk in renderer.render_stream(data):
+                buffer += chunk
+                if len(buffer) >= self.stream_buffer_size:
+                    await response.write(bytes(buffer))
+                    buffer.clear()
+            if buffer:
+                await response.write(bytes(buffer))
+
+        await response.write_eof()
+        return response
+
+    def is_conditional(self):
+        return self.conditional and self.request.method in ('GET', 'HEAD')
+
+    async def get_etag(self):
+        """
+        Returns a cheap entity tag for the current representation, e.g. from
+        a version column, or `None` to fall back to hashing the body.
+        """
+        return None
+
+    async def get_last_modified(self):
+        """
+        Returns the modification datetime of the current representation,
+        e.g. from an `updated_at` column, or `None`.
+        """
+        return None
+
+    async def check_validators(self):
+        """
+        Set the cheap validators as response headers and return `True` if
+        the client already holds the current representation, in which case
+        neither the handler nor the serializer run.
+        """
+        etag = await self.get_etag()
+        if etag is not None:
+            self.headers['ETag'] = quote_etag(str(etag))
+
+        last_modified = await self.get_last_modified()
+        if last_modified is not None:
+            self.headers['Last-Modified'] = http_date(last_modified)
+
+        return self.is_not_modified()
+
+    def is_not_modified(self):
+        """
+        Compare the validator headers set so far with the request's
+        conditional headers. If-None-Match takes precedence.
+        """
+        headers = self.request.headers
+        if_none_match = headers.get('If-None-Match')
+        if if_none_match is not None:
+            etag = self.headers.get('ETag')
+            if etag is None:
+                return False
+            if etag.startswith('W/'):
+                etag = etag[2:]
+            etags = parse_etags(if_none_match)
+            return '*' in etags or etag in etags
+
+        if_modified_since = headers.get('If-Modified-Since')
+        last_modified = self.headers.get('Last-Modified')
+        if if_modified_since is not None and last_modified is not None:
+            if_modified_since = parse_http_date(if_modified_since)
+            return if_modified_since is not None and \
+                parse_http_date(last_modified) <= if_modified_since
+
+        return False
+
+    def not_modified_response(self):
+        self.add_timing_header()
+        return web.Response(status=HTTP_304_NOT_MODIFIED, headers=self.headers)
+
+    def is_cacheable(self):
+        return self.cache_backend is not None and self.request.method in ('GET', 'HEAD')
+
+    @classmethod
+    def get_cache_namespace(cls):
+        return cls.cache_namespace or '{module}.{name}'.format(module=cls.__module__, name=cls.__qualname__)
+
+    @classmethod
+    async def invalidate_cache(cls):
+        """
+        Drop every cached response of the view's namespace, e.g. after a
+        write to the data it serves.
+        """
+        if cls.cache_backend is not None:
+            await cls.cache_backend.incr_version(cls.get_cache_namespace())
+
+    def get_cache_key_parts(self):
+        request = self.request
+        renderer = self.accepted_renderer
+        parts = [renderer.media_type if renderer is not None else '']
+        for part in self.cache_key_parts:
+            if part == 'path':
+                parts.append(request.path)
+            elif part == 'query':
+                # Encoded, so that '&' and '=' inside values cannot make two
+                # queries collide.
+                parts.append(urlencode(sorted(request.GET.items())))
+            elif part == 'user':
+                user = getattr(request, 'user', None)
+                parts.append(str(getattr(user, 'id', user)))
+            elif part.startswith('header:'):
+                parts.append(request.headers.get(part[len('header:'):], ''))
+            else:
+                raise ValueError('Unknown cache key part "{part}".'.format(part=part))
+        return parts
+
+    async def get_cache_key(self):
+        if self.cache_key is None:
+            namespace = self.get_cache_namespace()
+            version = await self.cache_backend.get_version(namespace)
+            digest = hashlib.blake2b('\n'.join(self.get_cache_key_parts()).encode('utf-8'), digest_size=16)
+            self.cache_key = '{namespace}:{version}:{digest}'.format(
+                namespace=namespace, version=version, digest=digest.hexdigest()
+            )
+        return self.cache_key
+
+    async def get_cached_response(self):
+        return await self.cache_backend.get(await self.get_cache_key())
+
+    async def cache_response(self, cached):
+        headers = dict(cached.headers)
+        headers.pop('Server-Timing', None)
+        await self.cache_backend.set(
+            await self.get_cache_key(), cached._replace(headers=headers),
+            timeout=self.cache_timeout, size=len(cached.body)
+        )
+
+    def cached_response(self, cached):
+        self.status_code = cached.status
+        self.headers.update(cached.headers)
+        if self.is_conditional() and self.is_not_modified():
+            return self.not_modified_response()
+
+        self.add_timing_header()
+        return web.Response(
+            body=cached.body,
+            content_type=cached.content_type,
+            charset=cached.charset,
+            status=cached.status,
+            headers=self.headers,
         )
 
+    def get_timer(self):
+        """
+        Returns a `Timer` for this request, or `None` when timing is disabled.
+        """
+        if self.server_timing or api_settings.TIMING_CALLBACK is not None:
+            return Timer()
+        return None
+
+    def add_timing_header(self):
+        """
+        Add the phases timed so far as a `Server-Timing` header. Streaming
+        responses send their headers before rendering, so `render` is only
+        reported to the timing callback for them.
+        """
+        if self.timer is not None and self.server_timing:
+            self.headers['Server-Timing'] = self.timer.server_timing_header()
+
+    async def report_timings(self, timer):
+        """
+        Pass the phase durations to `TIMING_CALLBACK`, if one is configured.
+        """
+        callback = api_settings.TIMING_CALLBACK
+        if callback is not None:
+            result = callback(self.request, self, timer.as_milliseconds())
+            if inspect.isawaitable(result):
+                await result
+
+    def get_fieldset(self):
+        """
+        Returns the `fields`/`exclude` serializer keyword arguments given by
+        the query, e.g. `?fields=id,name`. Unknown names are rejected by the
+        serializer with a 400 response. Select only the columns they need:
+
+            serializer = UserSerializer(users, many=True, **self.get_fieldset())
+            query = User.select(*serializer.select_columns())
+        """
+        kwargs = {}
+        for kwarg, param in (('fields', self.fields_query_param),
+                             ('exclude', self.exclude_query_param)):
+            value = self.request.GET.get(param)
+            if value is not None:
+                kwargs[kwarg] = [name.strip() for name in value.split(',') if name.strip()]
+        return kwargs
+
+    def get_parsers(self):
+        """
+        Instantiates and returns the list of parsers that this view can use.
+        """
+        return [parser() for parser in self.parser_classes]
+
+    def get_renderers(self):
+        """
+        Instantiates and returns the list of renderers that this view can use.
+        """
+        return [renderer() for renderer in self.renderer_classes]
+
+    def get_content_negotiator(self):
+        return self.content_negotiation_class()
+
+    def perform_content_negotiation(self):
+        """
+        Determine which renderer to use. Raises `NotAcceptable` if none of
+        the view's renderers satisfies the Accept header.
+        """
+        return self.get_content_negotiator().select_renderer(self.request, self.get_renderers())
+
     async def check_permissions(self):
         """
         Check if the request should be permitted.
         Raises an appropriate exception if the request is not permitted.
         """
-        for permission in self.get_permissions():
+        permissions = self.get_permissions()
+        if self.concurrent_permission_checks and len(permissions) > 1:
+            return await self.check_permissions_concurrently(permissions)
+
+        for permission in permissions:
             if not await permission.has_permission(self.request, self):
                 self.permission_denied(message=getattr(permission, 'message', None))
 
+    async def check_permissions_concurrently(self, permissions):
+        async def check(permission):
+            return permission, await permission.has_permission(self.request, self)
+
+        tasks = [asyncio.ensure_future(check(permission)) for permission in permissions]
+        try:
+            for future in asyncio.as_completed(tasks):
+                permission, allowed = await future
+                if not allowed:
+                    self.permission_denied(message=getattr(permission, 'message', None))
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def check_throttles(self):
+        """
+        Check if the request should be throttled.
+        Raises `Throttled` with the longest wait of the throttles that failed.
+        """
+        waits = []
+        for throttle in self.get_throttles():
+            if not await throttle.allow_request(self.request, self):
+                waits.append(throttle.wait())
+
+        if waits:
+            waits = [wait for wait in waits if wait is not None]
+            self.throttled(max(waits) if waits else None)
+
+    def get_throttles(self):
+        """
+        Instantiates and returns the list of throttles that this view uses.
+        """
+        return [throttle() for throttle in self.throttle_classes]
+
+    def throttled(self, wait):
+        """
+        If request is throttled, determine what kind of exception to raise.
+        """
+        raise Throttled(wait)
+
+    async def check_object_permissions(self, obj):
+        """
+        Check if the request should be permitted for a given object.
+        Raises an appropriate exception if the request is not permitted.
+        """
+        for permission in self.get_permissions():
+            if not await permission.has_object_permission(self.request, self, obj):
+                self.permission_denied(message=getattr(permission, 'message', None))
+
+    async def filter_query_permissions(self, query):
+        """
+        Returns `query` narrowed by the permissions defining `filter_query()`.
+        """
+        for permission in self.get_permissions():
+            if permission.filters_query():
+                query = await permission.filter_query(self.request, self, query)
+        return query
+
+    async def filter_object_permissions(self, objs, query_filtered=False):
+        """
+        Returns the objects of `objs` the request is permitted on, in order.
+        Each permission checks the remaining objects in one
+        `has_object_permissions()` call. Pass `query_filtered` for rows of a
+        query that went through `filter_query_permissions()`, to skip the
+        permissions that already filtered it.
+        """
+        objs = list(objs)
+        for permission in self.get_permissions():
+            if not objs:
+                break
+            if not permission.checks_objects():
+                continue
+            if query_filtered and permission.filters_query():
+                continue
+            allowed = await permission.has_object_permissions(self.request, self, objs)
+            objs = [obj for obj, is_allowed in zip(objs, allowed) if is_allowed]
+        return objs
+
     def get_permissions(self):
         """
-        Instantiates and returns the list of permissions that this view requires.
+        Returns the list of permissions that this view requires. Stateless
+        permissions are instantiated once per view class.
         """
-        return [permission() for permission in self.permission_classes]
+        view_class = type(self)
+        shared = view_class.__dict__.get('_shared_permissions')
+        if shared is None:
+            shared = view_class._shared_permissions = {}
+
+        permissions = []
+        for permission_class in self.permission_classes:
+            if not getattr(permission_class, 'stateless', False):
+                permissions.append(permission_class())
+                continue
+
+            permission = shared.get(permission_class)
+            if permission is None:
+                permission = shared[permission_class] = permission_class()
+            permissions.append(permission)
+        return permissions
 
     def permission_denied(self, message=None):
         """
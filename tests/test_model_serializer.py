@@ -0,0 +1,66 @@
+import asyncio
+import unittest
+import uuid
+
+import peewee
+
+from aiorest_framework.serializers import ModelSerializer
+
+db = peewee.SqliteDatabase(':memory:')
+
+
+class Country(peewee.Model):
+    code = peewee.CharField(primary_key=True, max_length=3)
+
+    class Meta:
+        database = db
+
+
+class Account(peewee.Model):
+    id = peewee.UUIDField(primary_key=True)
+
+    class Meta:
+        database = db
+
+
+class City(peewee.Model):
+    name = peewee.CharField()
+    country = peewee.ForeignKeyField(Country)
+    owner = peewee.ForeignKeyField(Account, null=True)
+
+    class Meta:
+        database = db
+
+
+class CitySerializer(ModelSerializer):
+    class Meta:
+        model = City
+
+
+class NonIntegerForeignKeyTests(unittest.TestCase):
+    def setUp(self):
+        db.create_tables([Country, Account, City])
+        self.account = Account.create(id=uuid.UUID(int=1))
+        Country.create(code='xyz')
+        City.create(name='Foo', country='xyz', owner=self.account)
+
+    def tearDown(self):
+        db.drop_tables([Country, Account, City])
+
+    def test_instances(self):
+        data = asyncio.run(CitySerializer(list(City.select()), many=True).data)
+        self.assertEqual(data[0]['country'], 'xyz')
+        self.assertEqual(data[0]['owner'], self.account.id)
+
+    def test_projected_tuples(self):
+        serializer = CitySerializer(many=True)
+        rows = list(serializer.get_query())
+        self.assertIsInstance(rows[0], tuple)
+
+        data = asyncio.run(CitySerializer(rows, many=True).data)
+        self.assertEqual(data[0]['country'], 'xyz')
+        self.assertEqual(data[0]['owner'], self.account.id)
+
+
+if __name__ == '__main__':
+    unittest.main()